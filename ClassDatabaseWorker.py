@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, Signal
+from database import Database
+
+
+class DatabaseWorker(QObject):
+    """Runs database work on a background thread that owns its own SQLite connection.
+
+    Tasks are plain functions called as task(db, *args) with the worker's Database. They run one at a time in
+    submission order, so a save queued before a load is always committed before the load reads. submit() returns a
+    concurrent.futures.Future, and the on_result/on_error callbacks are delivered back on the GUI thread through a
+    queued signal, so they can safely touch models and widgets.
+    """
+
+    busy_changed = Signal(bool)  # True when the first task is queued, False once every task has been delivered
+    error = Signal(object)  # Exceptions of tasks submitted without an on_error callback
+    _finished = Signal(object, object, object)
+
+    def __init__(self, db_path, profile=None, parent=None):
+        super().__init__(parent)
+        self.pending = 0
+        self._db = None  # Only ever touched on the worker thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='database',
+                                            initializer=self._open, initargs=(db_path, profile))
+        self._finished.connect(self._deliver)
+
+    def _open(self, db_path, profile):
+        self._db = Database.open(db_path, profile)
+
+    def _run(self, task, args):
+        return task(self._db, *args)
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+
+    def submit(self, task, *args, on_result=None, on_error=None):
+        """
+        Queue a task for the worker thread.
+
+        Args:
+            task (callable): Called as task(db, *args) on the worker thread.
+            *args: Extra arguments for the task. Pass snapshots, not objects the GUI thread keeps changing.
+            on_result (callable): Called with the task's return value on the GUI thread.
+            on_error (callable): Called with the exception on the GUI thread if the task fails. Without one, the
+                error signal is emitted instead.
+
+        Returns:
+            concurrent.futures.Future: The future of the task's result.
+        """
+        self.pending += 1
+        if self.pending == 1:
+            self.busy_changed.emit(True)
+        future = self._executor.submit(self._run, task, args)
+        # Emitted from the worker thread, so the connection queues the call onto the GUI thread
+        future.add_done_callback(lambda done: self._finished.emit(done, on_result, on_error))
+        return future
+
+    def _deliver(self, future, on_result, on_error):
+        self.pending -= 1
+        if self.pending == 0:
+            self.busy_changed.emit(False)
+        exception = future.exception()
+        if exception is None:
+            if on_result is not None:
+                on_result(future.result())
+        elif on_error is not None:
+            on_error(exception)
+        else:
+            self.error.emit(exception)
+
+    def close(self):
+        """Finish the queued tasks, then close the worker's connection and stop its thread."""
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=True)
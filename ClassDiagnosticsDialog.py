@@ -0,0 +1,118 @@
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QPushButton, QTableView,
+                               QFileDialog)
+from ClassRecordTableModel import RecordTableModel
+from database import Database
+
+
+class DiagnosticsDialog(QDialog):
+    """Shows the query profiler's per-statement statistics, slowest total first, and the statement cache hit rates.
+
+    Profiling is off unless main.py was started with --profile-queries or the checkbox here turns it on. It covers
+    the GUI connection and the background worker's alike, since the profiler is shared by every connection. The
+    statement cache is counted per connection, always.
+    """
+
+    HEADERS = ['Query', 'Count', 'Total ms', 'Mean ms', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms', 'Rows', 'Full Scan',
+               'Plan']
+
+    def __init__(self, parent=None, db=None, db_worker=None):
+        """
+        Args:
+            parent (QWidget): The parent widget.
+            db (Database): The GUI thread's connection, whose statement cache is reported.
+            db_worker (DatabaseWorker): The background worker, whose connection's statement cache is reported.
+        """
+        super().__init__(parent)
+        self.db = db
+        self.db_worker = db_worker
+        self.statement_caches = {}  # Connection name -> Database.statement_cache_stats()
+        self.setWindowTitle("Query Diagnostics")
+        self.resize(1000, 500)
+
+        layout = QVBoxLayout(self)
+
+        self.profile_checkbox = QCheckBox("Profile queries")
+        self.profile_checkbox.setChecked(Database.profiler is not None)
+        layout.addWidget(self.profile_checkbox)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.statement_cache_label = QLabel()
+        layout.addWidget(self.statement_cache_label)
+
+        self.model = RecordTableModel(self.HEADERS, None, self)  # Read-only
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setWordWrap(False)
+        layout.addWidget(self.table_view)
+
+        buttons = QHBoxLayout()
+        self.refresh_button = QPushButton("Refresh")
+        self.reset_button = QPushButton("Reset")
+        self.save_button = QPushButton("Save...")
+        buttons.addWidget(self.refresh_button)
+        buttons.addWidget(self.reset_button)
+        buttons.addStretch()
+        buttons.addWidget(self.save_button)
+        layout.addLayout(buttons)
+
+        self.profile_checkbox.toggled.connect(self.set_profiling)
+        self.refresh_button.clicked.connect(self.refresh)
+        self.reset_button.clicked.connect(self.reset)
+        self.save_button.clicked.connect(self.save)
+
+        self.refresh()
+
+    def set_profiling(self, enabled):
+        if enabled:
+            Database.enable_profiling()
+        else:
+            Database.disable_profiling()
+        self.refresh()
+
+    def refresh(self):
+        profiler = Database.profiler
+        report = profiler.report() if profiler is not None else []
+        self.model.load([(entry['query'].strip().replace('\n', ' '), entry['count'],
+                          *(f"{entry[key]:.3f}" for key in ('total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms',
+                                                            'max_ms')),
+                          entry['rows'], 'Yes' if entry['full_scan'] else '', '; '.join(entry['plan']))
+                         for entry in report])
+        self.table_view.resizeColumnsToContents()
+        self.table_view.setColumnWidth(0, min(self.table_view.columnWidth(0), 400))
+
+        if profiler is None:
+            self.summary_label.setText("Query profiling is off.")
+        else:
+            full_scans = sum(entry['full_scan'] for entry in report)
+            self.summary_label.setText(f"{len(report)} statements, {sum(entry['count'] for entry in report)} "
+                                       f"executions, {sum(entry['total_ms'] for entry in report):.1f} ms in total, "
+                                       f"{full_scans} with full table scans")
+        self.reset_button.setEnabled(profiler is not None)
+        self.save_button.setEnabled(profiler is not None)
+
+        if self.db is not None:
+            self.show_statement_cache('GUI', self.db.statement_cache_stats())
+        if self.db_worker is not None:
+            # The worker's connection may only be used on its own thread
+            self.db_worker.submit(Database.statement_cache_stats,
+                                  on_result=lambda stats: self.show_statement_cache('worker', stats))
+
+    def show_statement_cache(self, connection, stats):
+        self.statement_caches[connection] = stats
+        self.statement_cache_label.setText(
+            f"Statement cache ({stats['size']} statements per connection): " + ", ".join(
+                f"{name} {stats['hit_rate']:.1%} hits ({stats['hits']} of {stats['hits'] + stats['misses']})"
+                for name, stats in self.statement_caches.items()))
+
+    def reset(self):
+        if Database.profiler is not None:
+            Database.profiler.reset()
+        self.refresh()
+
+    def save(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Query Profile", "query_profile.json",
+                                                   "JSON files (*.json)")
+        if file_path and Database.profiler is not None:
+            Database.profiler.dump(file_path)
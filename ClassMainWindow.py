@@ -1,23 +1,65 @@
 from PySide6 import QtWidgets, QtCore
-from PySide6.QtGui import QStandardItemModel, QStandardItem
-from PySide6.QtWidgets import QComboBox, QDialog, QMessageBox
+from PySide6.QtCore import QStringListModel
+from PySide6.QtWidgets import QComboBox, QCompleter, QDialog, QMessageBox
 from MainWindow import Ui_MainWindow
 from repositories import TransactionsRepository, IncomeRepository, ExpensesRepository, LoansRepository, \
     AssetsRepository, CategoriesRepository
-from ClassAddIncomeDialog import AddIncomeDialog
-from ClassAddExpenseDialog import AddExpenseDialog
-from ClassAddLoanDialog import AddLoanDialog
+from ClassTransactionsTableModel import TransactionsTableModel
+from ClassRecordTableModel import RecordTableModel
+from ClassDatabaseWorker import DatabaseWorker
+from cache import CategoryCache, TabCache
+from reports import Reports
+
+
+# Background tasks, called as task(db, *args) on the database worker thread with the worker's own connection
+def _load_dashboard(db, forecast_years, forecast_scenarios):
+    import forecast  # Pulls in NumPy, so it is imported on the worker thread rather than at startup
+    cash_flow = Reports(db).monthly_cash_flow()
+    # A fixed seed keeps the forecast bands stable between dashboard refreshes
+    result = forecast.forecast(cash_flow[-1][4] if cash_flow else 0.0, IncomeRepository(db).all(),
+                               ExpensesRepository(db).all(), LoansRepository(db).all(), years=forecast_years,
+                               scenarios=forecast_scenarios, seed=0)
+    return cash_flow, result['percentiles']
+
+
+def _load_budget(db):
+    reports = Reports(db)
+    return reports.monthly_budget(), reports.monthly_budget_lines()
+
+
+def _save_transaction_categories(db, changed_transactions):
+    # Save the edited categories and register any new ones, all in a single transaction
+    with db.transaction():
+        TransactionsRepository(db).update_category_many((t[0], t[2]) for t in changed_transactions)
+        category_names = set(CategoriesRepository(db).names())
+
+        # Register new categories in the Categories table along with the description they were assigned to
+        new_categories = {}
+        for transaction in changed_transactions:
+            if transaction[2] and transaction[2] not in category_names:
+                new_categories.setdefault(transaction[2], transaction[1])
+        CategoriesRepository(db).create_many(
+            (description, category) for category, description in new_categories.items())
 
 
 class CategoryDelegate(QtWidgets.QStyledItemDelegate):
-    def __init__(self, parent, categories):
+    def __init__(self, parent, category_model):
         super().__init__(parent)
-        self.categories = categories
+        # One model of category names shared by every editor, kept sorted case-insensitively
+        self.category_model = category_model
 
     def createEditor(self, parent, option, index):
         combo_box = QComboBox(parent)
         combo_box.setEditable(True)
-        combo_box.addItems(self.categories)
+        # The model is shared by every editor and must stay sorted, so typed names are never inserted into it
+        combo_box.setInsertPolicy(QComboBox.NoInsert)
+        combo_box.setModel(self.category_model)
+
+        # The sorted model lets the completer binary search for the typed prefix instead of scanning every name
+        completer = QCompleter(self.category_model, combo_box)
+        completer.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        completer.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
+        combo_box.setCompleter(completer)
         return combo_box
 
     def setEditorData(self, editor, index):
@@ -32,6 +74,17 @@ class CategoryDelegate(QtWidgets.QStyledItemDelegate):
 
 
 class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
+    FORECAST_YEARS = 10
+    FORECAST_SCENARIOS = 2000
+    # The tables every tab reads, so switching to a tab only reloads it after one of them was written
+    TAB_TABLES = {
+        0: ('transactions', 'income', 'expenses', 'loans'),
+        1: ('income', 'expenses', 'loans'),
+        2: ('expenses',),
+        3: ('income',),
+        4: ('loans',),
+        6: ('transactions',),
+    }
 
     def __init__(self, db):
         super().__init__()
@@ -47,49 +100,47 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.assets_repo = AssetsRepository(db)
         self.categories_repo = CategoriesRepository(db)
 
+        # Loads and saves run on a background thread with its own connection, so the window never blocks on them
+        self.db_worker = DatabaseWorker(db.db_path, db.profile, self)
+        self.db_worker.busy_changed.connect(self.on_worker_busy_changed)
+        self.db_worker.error.connect(self.on_worker_error)
+        self.workerProgressBar = QtWidgets.QProgressBar(self)
+        self.workerProgressBar.setRange(0, 0)  # Busy indicator, tasks don't report how far along they are
+        self.workerProgressBar.setMaximumWidth(120)
+        self.workerProgressBar.hide()
+        self.statusbar.addPermanentWidget(self.workerProgressBar)
+        self.tab_cache = TabCache(db)
+
+        self.diagnostics_dialog = None
+        self.diagnosticsAction = self.menuFile.addAction("Query Diagnostics...")
+        self.diagnosticsAction.triggered.connect(self.show_diagnostics)
+
+        # Only the Dashboard tab is built upfront, every other tab builds its models and connections the first time
+        # it is shown
+        self.setup_dashboard_tab()
+        self.tab_setups = {
+            1: self.setup_budget_tab,
+            2: self.setup_expenses_tab,
+            3: self.setup_income_tab,
+            4: self.setup_loans_tab,
+            6: self.setup_transactions_tab,
+        }
+
         self.tabWidget.currentChanged.connect(self.on_tab_changed)
         # Set the default tab of the QTabWidget to index 0
         self.tabWidget.setCurrentIndex(0)
 
-        # Transaction Tab
-        # Initialize the original transactions data
-        self.original_transactions = None
-
-        # Add the save button to the Transactions tab
-        self.saveTransactionButton.setEnabled(False)
-        self.saveTransactionButton.clicked.connect(self.transaction_save_changes)
-
-        # Income Tab
-        # Add the add income button to the Income tab
-        self.addIncomeButton.clicked.connect(self.add_income)
-        self.deleteIncomeButton.clicked.connect(self.delete_income)
-        self.saveIncomeButton.clicked.connect(self.income_update_changes)
-        # Initialize the original income data
-        self.original_income = None
-
-        # Expenses Tab
-        # Add the add expense button to the Expenses tab
-        self.addExpenseButton.clicked.connect(self.add_expense)
-        self.deleteExpenseButton.clicked.connect(self.delete_expense)
-        self.saveExpenseButton.clicked.connect(self.expense_update_changes)
-        # Initialize the original expense data
-        self.original_expenses = None
-
-        # Loans Tab
-        # Add the add loan button to the Loans tab
-        self.addLoanButton.clicked.connect(self.add_loan)
-        self.deleteLoanButton.clicked.connect(self.delete_loan)
-        self.saveLoanButton.clicked.connect(self.loan_update_changes)
-        # Initialize the original loan data
-        self.original_loans = None
-
     def on_tab_changed(self, index):
-        if index == 0:  # Transactions tab
-            # TODO update Dashboard
-            pass
-        elif index == 1:  # Income tab
-            # TODO update Budget
-            pass
+        setup = self.tab_setups.pop(index, None)
+        if setup is not None:
+            setup()
+        if index in self.TAB_TABLES and not self.tab_cache.needs_load(index, self.TAB_TABLES[index]):
+            return  # Nothing the tab shows changed since it was last loaded, unsaved edits included
+
+        if index == 0:  # Dashboard tab
+            self.load_dashboard()
+        elif index == 1:  # Budget tab
+            self.load_budget()
         elif index == 2:  # Expenses tab
             # Update the Expenses tab with the loaded data
             self.load_expenses()
@@ -101,7 +152,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         elif index == 4:  # Assets tab
             # Update the Loans tab with the loaded data
             self.load_loans()
-            self.saveIncomeButton.setEnabled(False)
+            self.saveLoanButton.setEnabled(False)
         elif index == 5:
             # Update the Assets tab with the loaded data
             pass
@@ -109,106 +160,275 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             self.load_transactions()  # Call the load_transactions method
             self.saveTransactionButton.setEnabled(False)  # Disable the save button by default
 
+    def run_in_background(self, message, task, *args, on_result=None, on_error=None):
+        """Run a database task on the worker thread, showing a status bar message until every task is done."""
+        self.statusbar.showMessage(message)
+        return self.db_worker.submit(task, *args, on_result=on_result, on_error=on_error)
+
+    def on_worker_busy_changed(self, busy):
+        self.workerProgressBar.setVisible(busy)
+        if not busy:
+            self.statusbar.clearMessage()
+
+    def on_worker_error(self, exception):
+        self.tab_cache.invalidate()  # A failed load must not count as loaded
+        QMessageBox.critical(self, "Database Error", str(exception))
+
+    def save_failed(self, exception, reload):
+        # The edits were already handed to the worker, so show what the database actually holds
+        self.on_worker_error(exception)
+        reload()
+
+    # Dashboard Tab, monthly cash flow and the category breakdown of the selected month, aggregated in SQL
+    def setup_dashboard_tab(self):
+        self.dashboardSummaryLabel = QtWidgets.QLabel(self.dashboardTab)
+        self.dashboardSummaryLabel.setGeometry(QtCore.QRect(10, 0, 781, 30))
+
+        self.cash_flow_model = RecordTableModel(['Month', 'Income', 'Expenses', 'Net', 'Balance'], None, self)
+        self.cashFlowTableView = QtWidgets.QTableView(self.dashboardTab)
+        self.cashFlowTableView.setGeometry(QtCore.QRect(0, 30, 431, 481))
+        self.cashFlowTableView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.cashFlowTableView.setModel(self.cash_flow_model)
+        self.cashFlowTableView.selectionModel().currentRowChanged.connect(self.dashboard_on_month_changed)
+
+        self.category_totals_model = RecordTableModel(['Category', 'Total', 'Count'], None, self)
+        self.categoryTotalsTableView = QtWidgets.QTableView(self.dashboardTab)
+        self.categoryTotalsTableView.setGeometry(QtCore.QRect(440, 30, 361, 291))
+        self.categoryTotalsTableView.setModel(self.category_totals_model)
+
+        # Yearly balance forecast bands from the recurring income, expenses and loans
+        self.forecast_model = RecordTableModel(['Year', 'Low (P10)', 'Median', 'High (P90)'], None, self)
+        self.forecastTableView = QtWidgets.QTableView(self.dashboardTab)
+        self.forecastTableView.setGeometry(QtCore.QRect(440, 330, 361, 181))
+        self.forecastTableView.setModel(self.forecast_model)
+
+    def load_dashboard(self):
+        self.run_in_background("Loading dashboard...", _load_dashboard, self.FORECAST_YEARS,
+                               self.FORECAST_SCENARIOS, on_result=self.dashboard_loaded)
+
+    def dashboard_loaded(self, result):
+        cash_flow, bands = result
+        self.cash_flow_model.load(cash_flow)
+        self.cashFlowTableView.resizeColumnsToContents()  # Automatically adjust column widths
+        self.forecast_model.load(
+            (year, *(f"{band[year * 12 - 1]:,.2f}" for band in bands.values()))
+            for year in range(1, self.FORECAST_YEARS + 1))
+        self.forecastTableView.resizeColumnsToContents()  # Automatically adjust column widths
+
+        if cash_flow:
+            self.dashboardSummaryLabel.setText(f"{len(cash_flow)} months, balance {cash_flow[-1][4]:.2f}")
+            # Show the category breakdown of the latest month
+            self.cashFlowTableView.selectRow(len(cash_flow) - 1)
+        else:
+            self.dashboardSummaryLabel.setText("No transactions yet.")
+            self.category_totals_model.load([])
+
+    def dashboard_on_month_changed(self, current, previous):
+        if not current.isValid():
+            return
+        month = self.cash_flow_model.record_id(current.row())
+        self.run_in_background(f"Loading {month}...", lambda db: Reports(db).monthly_category_totals(month, month),
+                               on_result=self.dashboard_month_loaded)
+
+    def dashboard_month_loaded(self, totals):
+        self.category_totals_model.load([t[1:] for t in totals])
+        self.categoryTotalsTableView.resizeColumnsToContents()  # Automatically adjust column widths
+
+    # Budget Tab, recurring income, expenses and loan payments normalized to monthly amounts in SQL
+    def setup_budget_tab(self):
+        self.budgetSummaryLabel = QtWidgets.QLabel(self.budgetTab)
+        self.budgetSummaryLabel.setGeometry(QtCore.QRect(10, 0, 781, 30))
+
+        self.budget_model = RecordTableModel(['Type', 'Name', 'Monthly Amount'], None, self)
+        self.budgetTableView = QtWidgets.QTableView(self.budgetTab)
+        self.budgetTableView.setGeometry(QtCore.QRect(0, 30, 801, 481))
+        self.budgetTableView.setModel(self.budget_model)
+
+    def load_budget(self):
+        self.run_in_background("Loading budget...", _load_budget, on_result=self.budget_loaded)
+
+    def budget_loaded(self, result):
+        budget, lines = result
+        self.budgetSummaryLabel.setText(
+            f"Monthly income {budget['monthly_income']:.2f}, expenses {budget['monthly_expenses']:.2f}, "
+            f"loan payments {budget['monthly_loan_payments']:.2f}, surplus {budget['monthly_surplus']:.2f}")
+
+        self.budget_model.load(lines)
+        self.budgetTableView.resizeColumnsToContents()  # Automatically adjust column widths
+
     # Transactions Tab
-    def load_transactions(self):  # New method to load transactions
-        transactions = self.transactions_repo.all()
-        self.original_transactions = transactions.copy()  # Store the original transactions data
-
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(['ID', 'Account ID', 'Date', 'Amount', 'Description', 'Category'])
-
-        categories = self.categories_repo.all()
-        category_names = [c[1] for c in categories]
-        delegate = CategoryDelegate(self.transactionsTableView, category_names)
-
-        for transaction in transactions:
-            row = [
-                QStandardItem(str(transaction[0])),
-                QStandardItem(str(transaction[1])),
-                QStandardItem(str(transaction[2])),
-                QStandardItem(str(transaction[3])),
-                QStandardItem(str(transaction[4])),
-                QStandardItem(str(transaction[5])),
-            ]
-            for i in range(len(row)):
-                if i not in [5]:  # Disable editing for columns ID, Account ID, Date
-                    row[i].setEditable(False)
-            model.appendRow(row)
-
-        self.transactionsTableView.setModel(model)
-        self.transactionsTableView.setItemDelegateForColumn(5, delegate)
+    def setup_transactions_tab(self):
+        # The model is created once and only formats the cells the view asks for
+        self.transactions_model = TransactionsTableModel(self.transactions_repo, self, self.db_worker)
+        self.transactionsTableView.setModel(self.transactions_model)
+        # Size columns from the visible rows only instead of sampling the whole table
+        self.transactionsTableView.horizontalHeader().setResizeContentsPrecision(0)
+        # Connect the dataChanged signal of the model to a slot that enables the saveButton
+        self.transactions_model.dataChanged.connect(self.transaction_on_data_changed)
+        # Category names are cached and shared by every category editor through a single model
+        self.category_cache = CategoryCache(self.categories_repo)
+        self.category_model = QStringListModel(self)
+        self.category_model_generation = None
+        self.transactionsTableView.setItemDelegateForColumn(
+            TransactionsTableModel.CATEGORY_COLUMN, CategoryDelegate(self.transactionsTableView, self.category_model))
+
+        # Add the save button to the Transactions tab
+        self.saveTransactionButton.setEnabled(False)
+        self.saveTransactionButton.clicked.connect(self.transaction_save_changes)
+
+        # Full-text search box, searching once typing pauses rather than on every keystroke
+        self.transactionSearchEdit = QtWidgets.QLineEdit(self.transactionsTab)
+        self.transactionSearchEdit.setGeometry(QtCore.QRect(10, 470, 391, 28))
+        self.transactionSearchEdit.setPlaceholderText("Search descriptions and categories")
+        self.transactionSearchEdit.setClearButtonEnabled(True)
+        self.transactionSearchTimer = QtCore.QTimer(self)
+        self.transactionSearchTimer.setSingleShot(True)
+        self.transactionSearchTimer.setInterval(200)
+        self.transactionSearchTimer.timeout.connect(self.search_transactions)
+        self.transactionSearchEdit.textChanged.connect(self.transactionSearchTimer.start)
+        self.transactionSearchEdit.returnPressed.connect(self.search_transactions)
+
+        # Filtering and sorting happen in the database, the view only ever holds the pages scrolled through so far
+        self.filterTransactionButton = QtWidgets.QPushButton("Filter...", self.transactionsTab)
+        self.filterTransactionButton.setGeometry(QtCore.QRect(410, 470, 93, 28))
+        self.filterTransactionButton.clicked.connect(self.open_transaction_filter)
+        header = self.transactionsTableView.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        self.show_transaction_sort(self.transactions_model.transaction_filter)
+        header.sortIndicatorChanged.connect(self.transaction_sort_changed)
+
+    def load_transactions(self, search_text=None, transaction_filter=None):  # New method to load transactions
+        search_text = self.transactions_model.search_text if search_text is None else search_text
+        transaction_filter = transaction_filter or self.transactions_model.transaction_filter
+        self.run_in_background("Loading transactions...",
+                               lambda db: TransactionsTableModel.first_page(TransactionsRepository(db), search_text,
+                                                                            transaction_filter),
+                               on_result=lambda rows: self.transactions_loaded(rows, search_text, transaction_filter))
+
+    def reload_transactions(self, search_text, transaction_filter):
+        # Reloading drops pending category edits, so save them first. The worker runs tasks in order, so the reload
+        # already sees them.
+        if self.transactions_model.dirty:
+            self.transaction_save_changes()
+        self.load_transactions(search_text, transaction_filter)
+
+    def search_transactions(self):
+        self.transactionSearchTimer.stop()
+        search_text = self.transactionSearchEdit.text().strip()
+        if search_text != self.transactions_model.search_text:
+            self.reload_transactions(search_text, self.transactions_model.transaction_filter)
+
+    def open_transaction_filter(self):
+        # The account list needs a pass over the account index, so it is read in the background first, along with
+        # the category names
+        self.run_in_background("Loading accounts...",
+                               lambda db: (TransactionsRepository(db).accounts(), CategoriesRepository(db).names()),
+                               on_result=lambda result: self.show_transaction_filter_dialog(*result))
+
+    def show_transaction_filter_dialog(self, accounts, categories):
+        from ClassTransactionFilterDialog import TransactionFilterDialog
+        dialog = TransactionFilterDialog(self, self.transactions_model.transaction_filter, accounts, categories)
+        transaction_filter = dialog.transaction_filter if dialog.exec() == QDialog.Accepted else None
+        if transaction_filter is not None and transaction_filter != self.transactions_model.transaction_filter:
+            self.reload_transactions(self.transactions_model.search_text, transaction_filter)
+
+    def transaction_sort_changed(self, column, order):
+        sort = TransactionsTableModel.SORT_KEYS.get(column)
+        if sort is None:
+            # Only indexed columns can be sorted without reading every row, put the indicator back
+            self.show_transaction_sort(self.transactions_model.transaction_filter)
+            return
+        self.reload_transactions(self.transactions_model.search_text,
+                                 self.transactions_model.transaction_filter.replace(
+                                     sort=sort, descending=order == QtCore.Qt.DescendingOrder))
+
+    def show_transaction_sort(self, transaction_filter):
+        column = {sort: column for column, sort in TransactionsTableModel.SORT_KEYS.items()}[transaction_filter.sort]
+        header = self.transactionsTableView.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(column, QtCore.Qt.DescendingOrder if transaction_filter.descending
+                                else QtCore.Qt.AscendingOrder)
+        header.blockSignals(False)
+
+    def transactions_loaded(self, rows, search_text='', transaction_filter=None):
+        self.transactions_model.load(rows, search_text, transaction_filter)
+        self.show_transaction_sort(self.transactions_model.transaction_filter)
+        criteria = self.transactions_model.transaction_filter.criteria_count()
+        self.filterTransactionButton.setText(f"Filter ({criteria})..." if criteria else "Filter...")
+        self.refresh_category_model()
 
         self.transactionsTableView.resizeColumnsToContents()  # Automatically adjust column widths
 
-        # Connect the dataChanged signal of the model to a slot that enables the saveButton
-        model.dataChanged.connect(self.transaction_on_data_changed)
+    def refresh_category_model(self):
+        # The change stamp, and the names when they changed, are read on the worker
+        self.db_worker.submit(lambda db, stamp: CategoryCache.fetch(CategoriesRepository(db), stamp),
+                              self.category_cache.stamp, on_result=self.category_names_fetched)
+
+    def category_names_fetched(self, result):
+        # Only push the names into the shared model when the cache actually reloaded them
+        stamp, names = result
+        self.category_cache.update(stamp, names)
+        if self.category_cache.generation != self.category_model_generation:
+            self.category_model.setStringList(names)
+            self.category_model_generation = self.category_cache.generation
 
     def transaction_on_data_changed(self, topLeft, bottomRight):
         if topLeft.column() == 5:
             self.saveTransactionButton.setEnabled(True)
 
     def transaction_save_changes(self):
-        current_transactions = []
-        for row in range(self.transactionsTableView.model().rowCount()):
-            transaction = [
-                int(self.transactionsTableView.model().index(row, 0).data()),
-                int(self.transactionsTableView.model().index(row, 1).data()),
-                self.transactionsTableView.model().index(row, 2).data(),
-                float(self.transactionsTableView.model().index(row, 3).data()),
-                self.transactionsTableView.model().index(row, 4).data(),  # Use index 4 for the Description data
-                self.transactionsTableView.model().index(row, 5).data(),  # Use index 5 for the Category data
-            ]
-            current_transactions.append(transaction)
-
-        # Compare the current transactions data with the original data
-        if current_transactions != self.original_transactions:
-            # Save the changes to the Transactions table and register new categories and descriptions in the
-            # Categories table
-            for transaction in current_transactions:
-                self.transactions_repo.update_category(transaction[0], transaction[5])
-
-            categories = self.categories_repo.all()
-            category_names = [c[1] for c in categories]
-            new_categories = set([t[5] for t in current_transactions]).difference(set(category_names))
-            descriptions = set([t[4] for t in current_transactions])
-            for category, description in zip(new_categories, descriptions):
-                self.categories_repo.create(description, category)
-
-            # Reload the transactions data and disable the save button
-            self.load_transactions()
+        changed_transactions = self.transactions_model.dirty_rows()
+
+        if changed_transactions:
+            # Save only the edited categories in the background. The model already shows the saved values, so just
+            # clear the edits and disable the save button
+            self.run_in_background("Saving transactions...", _save_transaction_categories, changed_transactions,
+                                   on_result=self.transactions_saved,
+                                   on_error=lambda e: self.save_failed(e, self.load_transactions))
+            self.transactions_model.mark_clean()
             self.saveTransactionButton.setEnabled(False)
 
         else:
             # Warn the user that there are no changes to save
             QMessageBox.warning(self, "No Changes", "There are no changes to save.")
 
+    def transactions_saved(self, result):
+        self.refresh_category_model()
+
+    def show_diagnostics(self):
+        from ClassDiagnosticsDialog import DiagnosticsDialog
+        # Modeless, so it can stay open and be refreshed while clicking through the tabs
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self, self.db, self.db_worker)
+        self.diagnostics_dialog.refresh()
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+
     def closeEvent(self, event):
+        self.db_worker.close()
         self.db.close()
 
     # Income Tab, load income data from the database, and update the Income tab, columns ID, Name, Amount, Frequency
+    def setup_income_tab(self):
+        # Add the add income button to the Income tab
+        self.addIncomeButton.clicked.connect(self.add_income)
+        self.deleteIncomeButton.clicked.connect(self.delete_income)
+        self.saveIncomeButton.clicked.connect(self.income_update_changes)
+        # The model tracks edited rows so saving only writes what changed
+        self.income_model = RecordTableModel(['ID', 'Name', 'Amount', 'Frequency'], [int, str, float, float], self)
+        self.incomeTableView.setModel(self.income_model)
+        self.income_model.dataChanged.connect(self.income_on_data_changed)
+
     def load_income(self):
-        income = self.income_repo.all()
-        self.original_income = income.copy()  # Store the original income data
-
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(['ID', 'Name', 'Amount', 'Frequency'])
-
-        for i in income:
-            row = [
-                QStandardItem(str(i[0])),
-                QStandardItem(str(i[1])),
-                QStandardItem(str(i[2])),
-                QStandardItem(str(i[3])),
-            ]
-            model.appendRow(row)
-
-        self.incomeTableView.setModel(model)
-        self.incomeTableView.resizeColumnsToContents()  # Automatically adjust column widths
+        self.run_in_background("Loading income...", lambda db: IncomeRepository(db).all(), on_result=self.income_loaded)
 
-        # Connect the dataChanged signal of the model to a slot that enables the saveButton
-        model.dataChanged.connect(self.income_on_data_changed)
+    def income_loaded(self, records):
+        self.income_model.load(records)
+        self.incomeTableView.resizeColumnsToContents()  # Automatically adjust column widths
 
     def add_income(self):
+        from ClassAddIncomeDialog import AddIncomeDialog  # Dialogs are only imported once they are first opened
         dialog = AddIncomeDialog(self, self.income_repo)
         result = dialog.exec()
 
@@ -220,20 +440,19 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         selected_indexes = self.incomeTableView.selectedIndexes()
 
         if selected_indexes:
-            # Get the selected row
-            row = selected_indexes[0].row()
+            # Get the selected rows, bottom first so removing one doesn't shift the others
+            rows = sorted(set(index.row() for index in selected_indexes), reverse=True)
 
-            # Get the income ID from the first column of the selected row
-            income_id = int(self.incomeTableView.model().item(row, 0).text())
+            # Delete the selected income rows from the SQLite database in a single transaction
+            self.income_repo.delete_many(self.income_model.record_id(row) for row in rows)
 
-            # Delete the income from the SQLite database
-            self.income_repo.delete(income_id)
+            # Remove the rows from the incomeTableView
+            for row in rows:
+                self.income_model.removeRow(row)
 
-            # Remove the row from the incomeTableView
-            self.incomeTableView.model().removeRow(row)
-
-            # Display a message box to inform the user that the row was deleted
-            QMessageBox.information(self, "Row Deleted", "The selected row has been deleted.")
+            # Display a message box to inform the user that the rows were deleted
+            QMessageBox.information(self, "Row Deleted", "The selected row has been deleted." if len(rows) == 1
+                                    else f"The {len(rows)} selected rows have been deleted.")
 
         else:
             # Display a message box to inform the user to select a row
@@ -243,24 +462,15 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.saveIncomeButton.setEnabled(True)
 
     def income_update_changes(self):
-        current_income = []
-        for row in range(self.incomeTableView.model().rowCount()):
-            income = [
-                int(self.incomeTableView.model().index(row, 0).data()),
-                self.incomeTableView.model().index(row, 1).data(),
-                float(self.incomeTableView.model().index(row, 2).data()),
-                self.incomeTableView.model().index(row, 3).data(),
-            ]
-            current_income.append(income)
-
-        # Compare the current income data with the original data
-        if current_income != self.original_income:
-            # Save the changes to the Income table
-            for income in current_income:
-                self.income_repo.update(income[0], income[1], income[2], income[3])
-
-            # Reload the income data and disable the save button
-            self.load_income()
+        changed_income = self.income_model.dirty_rows()
+
+        if changed_income:
+            # Save only the edited rows to the Income table in the background, in a single transaction
+            self.run_in_background("Saving income...", lambda db, rows: IncomeRepository(db).update_many(rows),
+                                   changed_income, on_error=lambda e: self.save_failed(e, self.load_income))
+
+            # The model already shows the saved values, so just clear the edits and disable the save button
+            self.income_model.mark_clean()
             self.saveIncomeButton.setEnabled(False)
 
         else:
@@ -269,29 +479,26 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
     # Expenses Tab, load expense data from the database, and update the Expenses tab, columns ID, Name, Amount,
     # Frequency
+    def setup_expenses_tab(self):
+        # Add the add expense button to the Expenses tab
+        self.addExpenseButton.clicked.connect(self.add_expense)
+        self.deleteExpenseButton.clicked.connect(self.delete_expense)
+        self.saveExpenseButton.clicked.connect(self.expense_update_changes)
+        # The model tracks edited rows so saving only writes what changed
+        self.expense_model = RecordTableModel(['ID', 'Name', 'Amount', 'Frequency'], [int, str, float, int], self)
+        self.expenseTableView.setModel(self.expense_model)
+        self.expense_model.dataChanged.connect(self.expenses_on_data_changed)
+
     def load_expenses(self):
-        expenses = self.expense_repo.all()
-        self.original_expenses = expenses.copy()  # Store the original expense data
-
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(['ID', 'Name', 'Amount', 'Frequency'])
-
-        for e in expenses:
-            row = [
-                QStandardItem(str(e[0])),
-                QStandardItem(str(e[1])),
-                QStandardItem(str(e[2])),
-                QStandardItem(str(e[3])),
-            ]
-            model.appendRow(row)
-
-        self.expenseTableView.setModel(model)
-        self.expenseTableView.resizeColumnsToContents()  # Automatically adjust column widths
+        self.run_in_background("Loading expenses...", lambda db: ExpensesRepository(db).all(),
+                               on_result=self.expenses_loaded)
 
-        # Connect the dataChanged signal of the model to a slot that enables the saveButton
-        model.dataChanged.connect(self.expenses_on_data_changed)
+    def expenses_loaded(self, records):
+        self.expense_model.load(records)
+        self.expenseTableView.resizeColumnsToContents()  # Automatically adjust column widths
 
     def add_expense(self):
+        from ClassAddExpenseDialog import AddExpenseDialog
         dialog = AddExpenseDialog(self, self.expense_repo)
         result = dialog.exec()
 
@@ -303,20 +510,19 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         selected_indexes = self.expenseTableView.selectedIndexes()
 
         if selected_indexes:
-            # Get the selected row
-            row = selected_indexes[0].row()
-
-            # Get the expense ID from the first column of the selected row
-            expense_id = int(self.expenseTableView.model().item(row, 0).text())
+            # Get the selected rows, bottom first so removing one doesn't shift the others
+            rows = sorted(set(index.row() for index in selected_indexes), reverse=True)
 
-            # Delete the expense from the SQLite database
-            self.expense_repo.delete(expense_id)
+            # Delete the selected expense rows from the SQLite database in a single transaction
+            self.expense_repo.delete_many(self.expense_model.record_id(row) for row in rows)
 
-            # Remove the row from the expenseTableView
-            self.expenseTableView.model().removeRow(row)
+            # Remove the rows from the expenseTableView
+            for row in rows:
+                self.expense_model.removeRow(row)
 
-            # Display a message box to inform the user that the row was deleted
-            QMessageBox.information(self, "Row Deleted", "The selected row has been deleted.")
+            # Display a message box to inform the user that the rows were deleted
+            QMessageBox.information(self, "Row Deleted", "The selected row has been deleted." if len(rows) == 1
+                                    else f"The {len(rows)} selected rows have been deleted.")
 
         else:
             # Display a message box to inform the user to select a row
@@ -326,24 +532,15 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.saveExpenseButton.setEnabled(True)
 
     def expense_update_changes(self):
-        current_expenses = []
-        for row in range(self.expenseTableView.model().rowCount()):
-            expense = [
-                int(self.expenseTableView.model().index(row, 0).data()),
-                self.expenseTableView.model().index(row, 1).data(),
-                float(self.expenseTableView.model().index(row, 2).data()),
-                int(self.expenseTableView.model().index(row, 3).data()),
-            ]
-            current_expenses.append(expense)
-
-        # Compare the current expense data with the original data
-        if current_expenses != self.original_expenses:
-            # Save the changes to the Expenses table
-            for expense in current_expenses:
-                self.expense_repo.update(expense[0], expense[1], expense[2], expense[3])
-
-            # Reload the expense data and disable the save button
-            self.load_expenses()
+        changed_expenses = self.expense_model.dirty_rows()
+
+        if changed_expenses:
+            # Save only the edited rows to the Expenses table in the background, in a single transaction
+            self.run_in_background("Saving expenses...", lambda db, rows: ExpensesRepository(db).update_many(rows),
+                                   changed_expenses, on_error=lambda e: self.save_failed(e, self.load_expenses))
+
+            # The model already shows the saved values, so just clear the edits and disable the save button
+            self.expense_model.mark_clean()
             self.saveExpenseButton.setEnabled(False)
 
         else:
@@ -352,35 +549,28 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
     # Loans Tab, load loan data from the database, and update the Loans tab, columns ID, Name, Monthly_Payment,
     # Remaining_Balance, Starting_Date, APR, Last_Payment, Next_Payment
+    def setup_loans_tab(self):
+        # Add the add loan button to the Loans tab
+        self.addLoanButton.clicked.connect(self.add_loan)
+        self.deleteLoanButton.clicked.connect(self.delete_loan)
+        self.saveLoanButton.clicked.connect(self.loan_update_changes)
+        # The model tracks edited rows so saving only writes what changed
+        self.loan_model = RecordTableModel(
+            ['ID', 'Name', 'Monthly Payment', 'Remaining Balance', 'Starting Date', 'APR', 'Last Payment',
+             'Next Payment'], [int, str, float, float, str, float, str, str], self)
+        self.loanTableView.setModel(self.loan_model)
+        self.loan_model.dataChanged.connect(self.loans_on_data_changed)
+        self.setup_loan_projection()
+
     def load_loans(self):
-        loans = self.loans_repo.all()
-        self.original_loans = loans.copy()  # Store the original loan data
+        self.run_in_background("Loading loans...", lambda db: LoansRepository(db).all(), on_result=self.loans_loaded)
 
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(
-            ['ID', 'Name', 'Monthly Payment', 'Remaining Balance', 'Starting Date', 'APR', 'Last Payment',
-             'Next Payment'])
-
-        for l in loans:
-            row = [
-                QStandardItem(str(l[0])),
-                QStandardItem(str(l[1])),
-                QStandardItem(str(l[2])),
-                QStandardItem(str(l[3])),
-                QStandardItem(str(l[4])),
-                QStandardItem(str(l[5])),
-                QStandardItem(str(l[6])),
-                QStandardItem(str(l[7])),
-            ]
-            model.appendRow(row)
-
-        self.loanTableView.setModel(model)
+    def loans_loaded(self, records):
+        self.loan_model.load(records)
         self.loanTableView.resizeColumnsToContents()  # Automatically adjust column widths
 
-        # Connect the dataChanged signal of the model to a slot that enables the saveButton
-        model.dataChanged.connect(self.loans_on_data_changed)
-
     def add_loan(self):
+        from ClassAddLoanDialog import AddLoanDialog
         dialog = AddLoanDialog(self, self.loans_repo)
         result = dialog.exec()
 
@@ -392,20 +582,19 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         selected_indexes = self.loanTableView.selectedIndexes()
 
         if selected_indexes:
-            # Get the selected row
-            row = selected_indexes[0].row()
+            # Get the selected rows, bottom first so removing one doesn't shift the others
+            rows = sorted(set(index.row() for index in selected_indexes), reverse=True)
 
-            # Get the loan ID from the first column of the selected row
-            loan_id = int(self.loanTableView.model().item(row, 0).text())
+            # Delete the selected loan rows from the SQLite database in a single transaction
+            self.loans_repo.delete_many(self.loan_model.record_id(row) for row in rows)
 
-            # Delete the loan from the SQLite database
-            self.loans_repo.delete(loan_id)
+            # Remove the rows from the loanTableView
+            for row in rows:
+                self.loan_model.removeRow(row)
 
-            # Remove the row from the loanTableView
-            self.loanTableView.model().removeRow(row)
-
-            # Display a message box to inform the user that the row was deleted
-            QMessageBox.information(self, "Row Deleted", "The selected row has been deleted.")
+            # Display a message box to inform the user that the rows were deleted
+            QMessageBox.information(self, "Row Deleted", "The selected row has been deleted." if len(rows) == 1
+                                    else f"The {len(rows)} selected rows have been deleted.")
 
         else:
             # Display a message box to inform the user to select a row
@@ -414,29 +603,53 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
     def loans_on_data_changed(self, topLeft, bottomRight):
         self.saveLoanButton.setEnabled(True)
 
+    # Payoff projection of the loans shown in the table, recomputed from the model on every load, edit and delete
+    def setup_loan_projection(self):
+        self.loanExtraSpinBox = QtWidgets.QDoubleSpinBox(self.loansTab)
+        self.loanExtraSpinBox.setGeometry(QtCore.QRect(360, 460, 121, 28))
+        self.loanExtraSpinBox.setPrefix("Extra ")
+        self.loanExtraSpinBox.setMaximum(1000000)
+        self.loanExtraSpinBox.setValue(100)
+        self.loanExtraSpinBox.valueChanged.connect(self.update_loan_projection)
+
+        self.loanProjectionLabel = QtWidgets.QLabel(self.loansTab)
+        self.loanProjectionLabel.setGeometry(QtCore.QRect(490, 435, 311, 81))
+        self.loanProjectionLabel.setWordWrap(True)
+
+        self.loan_model.modelReset.connect(self.update_loan_projection)
+        self.loan_model.rowsRemoved.connect(self.update_loan_projection)
+        self.loan_model.dataChanged.connect(self.update_loan_projection)
+
+    def update_loan_projection(self, *args):
+        if not self.loan_model.rows:
+            self.loanProjectionLabel.setText("No loans.")
+            return
+
+        import amortization  # Pulls in NumPy, so it waits until the Loans tab is first shown
+        balance, apr, payment = amortization.loan_arrays(self.loan_model.rows)
+        extra = self.loanExtraSpinBox.value()
+        strategies = amortization.compare_strategies(balance, apr, payment, extra)
+
+        def describe(result):
+            if not result['total_interest'] < float('inf'):
+                return "never paid off"
+            return f"{int(result['months'])} months, interest {result['total_interest']:,.2f}"
+
+        self.loanProjectionLabel.setText(
+            f"Minimum payments: {describe(strategies['minimum'])}\n"
+            f"Avalanche with {extra:,.2f} extra: {describe(strategies['avalanche'])}\n"
+            f"Snowball with {extra:,.2f} extra: {describe(strategies['snowball'])}")
+
     def loan_update_changes(self):
-        current_loans = []
-        for row in range(self.loanTableView.model().rowCount()):
-            loan = [
-                int(self.loanTableView.model().index(row, 0).data()),
-                self.loanTableView.model().index(row, 1).data(),
-                float(self.loanTableView.model().index(row, 2).data()),
-                float(self.loanTableView.model().index(row, 3).data()),
-                self.loanTableView.model().index(row, 4).data(),
-                float(self.loanTableView.model().index(row, 5).data()),
-                self.loanTableView.model().index(row, 6).data(),
-                self.loanTableView.model().index(row, 7).data(),
-            ]
-            current_loans.append(loan)
-
-        # Compare the current loan data with the original data
-        if current_loans != self.original_loans:
-            # Save the changes to the Loans table
-            for loan in current_loans:
-                self.loans_repo.update(loan[0], loan[1], loan[2], loan[3], loan[4], loan[5], loan[6], loan[7])
-
-            # Reload the loan data and disable the save button
-            self.load_loans()
+        changed_loans = self.loan_model.dirty_rows()
+
+        if changed_loans:
+            # Save only the edited rows to the Loans table in the background, in a single transaction
+            self.run_in_background("Saving loans...", lambda db, rows: LoansRepository(db).update_many(rows),
+                                   changed_loans, on_error=lambda e: self.save_failed(e, self.load_loans))
+
+            # The model already shows the saved values, so just clear the edits and disable the save button
+            self.loan_model.mark_clean()
             self.saveLoanButton.setEnabled(False)
 
         else:
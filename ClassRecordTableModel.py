@@ -0,0 +1,84 @@
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Editable table model for the small record tables (income, expenses, loans).
+
+    The first column holds the record ID and is read-only. Edited cells are converted with the column's converter
+    and tracked per record, so saving only has to write the rows that actually changed. Pass converters=None for a
+    read-only table.
+    """
+
+    def __init__(self, headers, converters, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.converters = converters
+        self.rows = []
+        self.dirty = {}  # Record ID -> set of edited columns
+
+    def load(self, records):
+        """Replace the model contents with freshly loaded records and forget any pending edits."""
+        self.beginResetModel()
+        self.rows = [list(record[:len(self.headers)]) for record in records]
+        self.dirty = {}
+        self.endResetModel()
+
+    def record_id(self, row):
+        return self.rows[row][0]
+
+    def dirty_rows(self):
+        """Return the edited records as tuples, in table order."""
+        return [tuple(row) for row in self.rows if row[0] in self.dirty]
+
+    def mark_clean(self):
+        """Forget pending edits once they have been saved."""
+        self.dirty = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.EditRole):
+            return str(self.rows[index.row()][index.column()])
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole or self.converters is None:
+            return False
+        try:
+            value = self.converters[index.column()](value)
+        except ValueError:
+            return False  # Reject input that doesn't fit the column
+        row = self.rows[index.row()]
+        if row[index.column()] == value:
+            return False
+        row[index.column()] = value
+        self.dirty.setdefault(row[0], set()).add(index.column())
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() != 0 and self.converters is not None:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row + count > len(self.rows):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        for record in self.rows[row:row + count]:
+            self.dirty.pop(record[0], None)
+        del self.rows[row:row + count]
+        self.endRemoveRows()
+        return True
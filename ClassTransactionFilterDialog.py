@@ -0,0 +1,125 @@
+from PySide6.QtCore import QDate
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QComboBox, QDateEdit,
+                               QDoubleSpinBox, QPushButton)
+
+
+class TransactionFilterDialog(QDialog):
+    """Edits the filter criteria of the transactions view. The sort order is set by clicking the column headers."""
+
+    DATE_FORMAT = "yyyy-MM-dd"
+
+    def __init__(self, parent, transaction_filter, accounts, categories):
+        """
+        Args:
+            parent (QWidget): The parent widget.
+            transaction_filter (TransactionFilter): The current filter, shown in the inputs.
+            accounts (list): The account IDs to choose from.
+            categories (list): The category names to choose from.
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Filter Transactions")
+        self.transaction_filter = transaction_filter
+
+        layout = QVBoxLayout(self)
+
+        self.start_date_checkbox, self.start_date_input = self._add_date(layout, "From")
+        self.end_date_checkbox, self.end_date_input = self._add_date(layout, "To")
+
+        self.account_label = QLabel("Account")
+        self.account_input = QComboBox()
+        self.account_input.addItem("All accounts", None)
+        for account_id in accounts:
+            self.account_input.addItem(str(account_id), account_id)
+        layout.addWidget(self.account_label)
+        layout.addWidget(self.account_input)
+
+        self.min_amount_checkbox, self.min_amount_input = self._add_amount(layout, "Minimum Amount")
+        self.max_amount_checkbox, self.max_amount_input = self._add_amount(layout, "Maximum Amount")
+
+        self.category_label = QLabel("Category")
+        self.category_input = QComboBox()
+        self.category_input.addItem("All categories", None)
+        for name in categories:
+            self.category_input.addItem(name, name)
+        layout.addWidget(self.category_label)
+        layout.addWidget(self.category_input)
+
+        self.uncategorized_checkbox = QCheckBox("Uncategorized only")
+        self.uncategorized_checkbox.toggled.connect(lambda checked: self.category_input.setEnabled(not checked))
+        layout.addWidget(self.uncategorized_checkbox)
+
+        buttons = QHBoxLayout()
+        self.clear_button = QPushButton("Clear")
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.setDefault(True)
+        buttons.addWidget(self.clear_button)
+        buttons.addStretch()
+        buttons.addWidget(self.apply_button)
+        layout.addLayout(buttons)
+
+        self.clear_button.clicked.connect(self.clear)
+        self.apply_button.clicked.connect(self.apply)
+
+        self.show_filter(transaction_filter)
+
+    @staticmethod
+    def _add_date(layout, label):
+        checkbox = QCheckBox(label)
+        date_input = QDateEdit()
+        date_input.setCalendarPopup(True)
+        date_input.setDisplayFormat(TransactionFilterDialog.DATE_FORMAT)
+        checkbox.toggled.connect(date_input.setEnabled)
+        layout.addWidget(checkbox)
+        layout.addWidget(date_input)
+        return checkbox, date_input
+
+    @staticmethod
+    def _add_amount(layout, label):
+        checkbox = QCheckBox(label)
+        amount_input = QDoubleSpinBox()
+        amount_input.setRange(-2147483647, 2147483647)
+        amount_input.setDecimals(2)
+        checkbox.toggled.connect(amount_input.setEnabled)
+        layout.addWidget(checkbox)
+        layout.addWidget(amount_input)
+        return checkbox, amount_input
+
+    def show_filter(self, transaction_filter):
+        for checkbox, date_input, value in [(self.start_date_checkbox, self.start_date_input,
+                                             transaction_filter.start_date),
+                                            (self.end_date_checkbox, self.end_date_input,
+                                             transaction_filter.end_date)]:
+            checkbox.setChecked(value is not None)
+            date_input.setEnabled(value is not None)
+            date_input.setDate(QDate.fromString(value, self.DATE_FORMAT) if value else QDate.currentDate())
+        for checkbox, amount_input, value in [(self.min_amount_checkbox, self.min_amount_input,
+                                               transaction_filter.min_amount),
+                                              (self.max_amount_checkbox, self.max_amount_input,
+                                               transaction_filter.max_amount)]:
+            checkbox.setChecked(value is not None)
+            amount_input.setEnabled(value is not None)
+            amount_input.setValue(value or 0.0)
+        self.account_input.setCurrentIndex(max(self.account_input.findData(transaction_filter.account_id), 0))
+        self.category_input.setCurrentIndex(max(self.category_input.findData(transaction_filter.category), 0))
+        self.uncategorized_checkbox.setChecked(transaction_filter.uncategorized)
+        self.category_input.setEnabled(not transaction_filter.uncategorized)
+
+    def clear(self):
+        # Clearing keeps the sort order, which isn't edited here
+        self.show_filter(self.transaction_filter.replace(start_date=None, end_date=None, account_id=None,
+                                                         min_amount=None, max_amount=None, category=None,
+                                                         uncategorized=False))
+
+    def apply(self):
+        def checked(checkbox, value):
+            return value if checkbox.isChecked() else None
+
+        self.transaction_filter = self.transaction_filter.replace(
+            start_date=checked(self.start_date_checkbox, self.start_date_input.date().toString(self.DATE_FORMAT)),
+            end_date=checked(self.end_date_checkbox, self.end_date_input.date().toString(self.DATE_FORMAT)),
+            account_id=self.account_input.currentData(),
+            min_amount=checked(self.min_amount_checkbox, self.min_amount_input.value()),
+            max_amount=checked(self.max_amount_checkbox, self.max_amount_input.value()),
+            category=None if self.uncategorized_checkbox.isChecked() else self.category_input.currentData(),
+            uncategorized=self.uncategorized_checkbox.isChecked())
+        self.accept()
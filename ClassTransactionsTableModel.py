@@ -0,0 +1,225 @@
+from array import array
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from repositories import TransactionFilter, TransactionsRepository
+
+
+def _fetch_next_page(db, search_text, transaction_filter, after, offset):
+    # Runs on the database worker thread with the worker's own connection
+    return TransactionsTableModel.next_page(TransactionsRepository(db), search_text, transaction_filter, after, offset)
+
+
+class TransactionsTableModel(QAbstractTableModel):
+    """Table model for the transactions tab.
+
+    Rows are kept in a compact column store (typed arrays for numbers, plain lists for text) and cells are only
+    formatted when the view asks for them, so no per-cell item objects are ever created. Rows are loaded a page at
+    a time through keyset pagination as the view scrolls (canFetchMore/fetchMore), and edited cells are tracked so
+    saving only writes the rows that changed. Which rows are shown, and their order, is set by transaction_filter
+    and applied by the database. While search_text is set, the pages come from the full-text search instead, best
+    matches first.
+
+    With a DatabaseWorker, the pages after the first are read on the worker: the next page is prefetched as soon as
+    the view asks whether there is more, and appended when the view asks for it or, if it wasn't ready yet, as soon
+    as it arrives. Without one they are read on the calling thread.
+    """
+
+    HEADERS = ['ID', 'Account ID', 'Date', 'Amount', 'Description', 'Category']
+    CATEGORY_COLUMN = 5
+    PAGE_SIZE = 500
+    # The columns the view can be sorted on, mapped to their TransactionFilter sort key
+    SORT_KEYS = {2: 'date', 3: 'amount'}
+
+    def __init__(self, transactions_repo, parent=None, db_worker=None):
+        super().__init__(parent)
+        self.transactions_repo = transactions_repo
+        self.db_worker = db_worker
+        self.search_text = ''
+        self.transaction_filter = TransactionFilter()
+        self.exhausted = True
+        self._generation = 0  # Bumped by every reload, so pages fetched for the previous rows are dropped
+        self._clear()
+
+    def _clear(self):
+        self.ids = array('q')
+        self.account_ids = []
+        self.dates = []
+        self.amounts = array('d')
+        self.descriptions = []
+        self.categories = []
+        self.dirty = {}  # Row -> set of edited columns
+        self._generation += 1
+        self._fetching = False  # A page is being read on the worker
+        self._prefetched = None  # The next page, read but not appended yet
+        self._waiting = False  # The view asked for the page being read, append it as soon as it arrives
+
+    def _append(self, rows):
+        # Repeated account IDs share a single string object
+        account_ids = {}
+        for row in rows:
+            self.ids.append(row[0])
+            self.account_ids.append(account_ids.setdefault(row[1], row[1]))
+            self.dates.append(row[2])
+            self.amounts.append(row[3])
+            self.descriptions.append(row[4])
+            self.categories.append(row[5])
+
+    @classmethod
+    def first_page(cls, transactions_repo, search_text='', transaction_filter=None):
+        """Fetch the first page of filtered transactions, or of search results when search_text is set."""
+        if search_text:
+            return transactions_repo.search(search_text, cls.PAGE_SIZE, transaction_filter=transaction_filter)
+        return transactions_repo.page(None, cls.PAGE_SIZE, transaction_filter)
+
+    @classmethod
+    def next_page(cls, transactions_repo, search_text, transaction_filter, after, offset):
+        """Fetch the page that follows the rows loaded so far, given the position returned by _position()."""
+        if search_text:
+            # Search results are ranked, not in (sort column, id) order, so they page by offset
+            return transactions_repo.search(search_text, cls.PAGE_SIZE, offset, transaction_filter)
+        return transactions_repo.page(after, cls.PAGE_SIZE, transaction_filter)
+
+    def _position(self):
+        # The (sort value, id) key of the last loaded row, and the number of loaded rows
+        sort_values = {'date': self.dates, 'amount': self.amounts}[self.transaction_filter.sort]
+        after = (sort_values[-1], self.ids[-1]) if self.ids else None
+        return after, len(self.ids)
+
+    def _prefetch(self):
+        # Read the next page on the worker, unless it is already being read or waiting to be appended
+        if self.exhausted or self._fetching or self._prefetched is not None:
+            return
+        self._fetching = True
+        generation = self._generation
+        self.db_worker.submit(_fetch_next_page, self.search_text, self.transaction_filter, *self._position(),
+                              on_result=lambda rows: self._page_fetched(generation, rows),
+                              on_error=lambda error: self._page_failed(generation, error))
+
+    def _page_fetched(self, generation, rows):
+        if generation != self._generation:
+            return  # The model was reloaded since the page was requested
+        self._fetching = False
+        self.exhausted = len(rows) < self.PAGE_SIZE
+        self._prefetched = rows
+        if self._waiting:
+            self._waiting = False
+            self.fetchMore()
+
+    def _page_failed(self, generation, error):
+        if generation == self._generation:
+            # Stop paging rather than retrying the failing read on every scroll, reloading starts over
+            self._fetching = self._waiting = False
+            self.exhausted = True
+        self.db_worker.error.emit(error)
+
+    def load(self, rows=None, search_text=None, transaction_filter=None):
+        """
+        Reload the model with the first page of transactions.
+
+        Args:
+            rows (list): The first page, as returned by first_page(), when it was already fetched elsewhere (e.g. on
+                a background thread). Fetched here when None.
+            search_text (str): The search the rows belong to, '' for every transaction. Keeps the current search
+                when None.
+            transaction_filter (TransactionFilter): The filter and sort order the rows belong to. Keeps the current
+                one when None.
+        """
+        if search_text is not None:
+            self.search_text = search_text
+        if transaction_filter is not None:
+            self.transaction_filter = transaction_filter
+        if rows is None:
+            rows = self.first_page(self.transactions_repo, self.search_text, self.transaction_filter)
+        self.beginResetModel()
+        self._clear()
+        self.exhausted = len(rows) < self.PAGE_SIZE
+        self._append(rows)
+        self.endResetModel()
+
+    def dirty_rows(self):
+        """Return (id, description, category) for every row whose category was edited."""
+        return [(self.ids[row], self.descriptions[row], self.categories[row]) for row in sorted(self.dirty)]
+
+    def mark_clean(self):
+        """Forget pending edits once they have been saved."""
+        self.dirty = {}
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        if self.db_worker is not None:
+            # The view asks as it nears the end of the rows, which is the time to start reading the next page
+            self._prefetch()
+        return self._prefetched is not None or not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self.db_worker is None:
+            if self.exhausted:
+                return
+            rows = self.next_page(self.transactions_repo, self.search_text, self.transaction_filter,
+                                  *self._position())
+            self.exhausted = len(rows) < self.PAGE_SIZE
+        else:
+            rows, self._prefetched = self._prefetched, None
+            if rows is None:
+                self._waiting = not self.exhausted
+                self._prefetch()
+                return
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.ids), len(self.ids) + len(rows) - 1)
+            self._append(rows)
+            self.endInsertRows()
+        if self.db_worker is not None:
+            self._prefetch()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == 0:
+                return str(self.ids[row])
+            elif column == 1:
+                return str(self.account_ids[row])
+            elif column == 2:
+                return str(self.dates[row])
+            elif column == 3:
+                return str(self.amounts[row])
+            elif column == 4:
+                return self.descriptions[row]
+            elif column == 5:
+                return self.categories[row] or ''
+        elif role == Qt.TextAlignmentRole and column == 3:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole or index.column() != self.CATEGORY_COLUMN:
+            return False
+        value = value or None  # The editor commits '' for no category, which is stored as NULL
+        if self.categories[index.row()] == value:
+            return False
+        self.categories[index.row()] = value
+        self.dirty.setdefault(index.row(), set()).add(index.column())
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == self.CATEGORY_COLUMN:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
@@ -0,0 +1,232 @@
+"""Vectorized loan amortization and payoff projections.
+
+Every function works on all loans at once: balances, APRs (in percent, as stored in the Loans table) and monthly
+payments are NumPy arrays with one entry per loan. Payoff times, balances and interest use the closed-form annuity
+formulas; only the extra-payment strategies, where money freed by one loan rolls over to the next, step month by
+month, and even then each step is a handful of array operations across every loan.
+"""
+import numpy as np
+
+# Projections stop after this many months (100 years), which also bounds loans whose payment never covers the
+# interest
+MAX_MONTHS = 1200
+
+
+def loan_arrays(loans):
+    """
+    Pull the amortization inputs out of Loans rows.
+
+    Args:
+        loans (list): Loans rows (ID, Name, Monthly_Payment, Remaining_Balance, Starting_Date, APR, Last_Payment,
+            Next_Payment).
+
+    Returns:
+        tuple: The balance, APR and monthly payment arrays.
+    """
+    balance = np.array([loan[3] for loan in loans], dtype=float)
+    apr = np.array([loan[5] for loan in loans], dtype=float)
+    payment = np.array([loan[2] for loan in loans], dtype=float)
+    return balance, apr, payment
+
+
+def monthly_rate(apr):
+    """Convert APRs in percent to monthly interest rates."""
+    return np.asarray(apr, dtype=float) / 100 / 12
+
+
+def _growth_factors(rate, months):
+    # (1 + r)^k and ((1 + r)^k - 1) / r, computed through log1p/expm1 so small rates stay accurate
+    log_growth = months * np.log1p(rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(rate == 0, months, np.expm1(log_growth) / rate)
+    return np.exp(log_growth), annuity
+
+
+def balance_after(balance, apr, payment, months):
+    """
+    Compute the closed-form balance after a number of full payments. Negative results mean the loan is paid off.
+
+    Args:
+        balance (array): The current balances.
+        apr (array): The APRs in percent.
+        payment (array): The monthly payments.
+        months (array): The number of payments, broadcast against the loan arrays.
+
+    Returns:
+        array: The remaining balances.
+    """
+    growth, annuity = _growth_factors(monthly_rate(apr), np.asarray(months, dtype=float))
+    return np.asarray(balance, dtype=float) * growth - np.asarray(payment, dtype=float) * annuity
+
+
+def months_to_payoff(balance, apr, payment):
+    """
+    Compute how many monthly payments each loan needs, in closed form.
+
+    Args:
+        balance (array): The current balances.
+        apr (array): The APRs in percent.
+        payment (array): The monthly payments.
+
+    Returns:
+        array: The number of payments, the last one possibly partial, or inf where the payment doesn't cover the
+        monthly interest.
+    """
+    balance = np.asarray(balance, dtype=float)
+    payment = np.asarray(payment, dtype=float)
+    rate = monthly_rate(apr)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        months = np.where(rate == 0, balance / payment, -np.log1p(-rate * balance / payment) / np.log1p(rate))
+    months = np.where((payment <= 0) | (payment <= rate * balance), np.inf, months)
+    months = np.where(balance <= 0, 0, months)
+    # Round away floating point noise before counting the final partial payment as a whole one
+    return np.ceil(np.round(months, 9))
+
+
+def total_interest(balance, apr, payment):
+    """
+    Compute the interest each loan will cost until it is paid off, in closed form.
+
+    Returns:
+        array: The total interest, or inf for loans that are never paid off.
+    """
+    balance = np.asarray(balance, dtype=float)
+    payment = np.asarray(payment, dtype=float)
+    payments = months_to_payoff(balance, apr, payment)
+    finite = np.isfinite(payments) & (payments > 0)
+    full_payments = np.where(finite, payments - 1, 0)
+    final_payment = balance_after(balance, apr, payment, full_payments) * (1 + monthly_rate(apr))
+    interest = payment * full_payments + final_payment - balance
+    return np.where(finite, interest, np.where(payments == 0, 0.0, np.inf))
+
+
+def schedules(balance, apr, payment, max_months=MAX_MONTHS):
+    """
+    Build the full amortization schedule of every loan at once.
+
+    Args:
+        balance (array): The current balances.
+        apr (array): The APRs in percent.
+        payment (array): The monthly payments.
+        max_months (int): The longest schedule to build.
+
+    Returns:
+        dict: 'payment', 'interest', 'principal' and 'balance' arrays of shape (loans, months), where column k is
+        payment k + 1 and months after a loan's payoff are zero.
+    """
+    balance = np.asarray(balance, dtype=float)
+    payment = np.asarray(payment, dtype=float)
+    rate = monthly_rate(apr)[:, np.newaxis]
+    payments = np.minimum(months_to_payoff(balance, apr, payment), max_months)
+    months = int(payments.max()) if payments.size else 0
+
+    k = np.arange(months, dtype=float)[np.newaxis, :]
+    opening = np.maximum(balance_after(balance[:, np.newaxis], apr[:, np.newaxis], payment[:, np.newaxis], k), 0)
+    active = k < payments[:, np.newaxis]
+    interest = np.where(active, opening * rate, 0)
+    paid = np.where(active, np.minimum(payment[:, np.newaxis], opening + interest), 0)
+    return {
+        'payment': paid,
+        'interest': interest,
+        'principal': paid - interest,
+        'balance': np.where(active, opening + interest - paid, 0),
+    }
+
+
+def payoff_months(next_payment_dates, payments):
+    """
+    Turn payment counts into the month of each loan's final payment.
+
+    Args:
+        next_payment_dates (list): The ISO date of each loan's next payment.
+        payments (array): The number of payments left, as returned by months_to_payoff.
+
+    Returns:
+        list: 'YYYY-MM' strings, or None for loans that are already paid off or never will be.
+    """
+    result = []
+    for date, count in zip(next_payment_dates, payments):
+        if not np.isfinite(count) or count <= 0:
+            result.append(None)
+        else:
+            month = np.datetime64(str(date)[:7], 'M') + int(count) - 1
+            result.append(str(month))
+    return result
+
+
+def simulate_payoff(balance, apr, payment, extra=0.0, order=None, max_months=MAX_MONTHS):
+    """
+    Simulate paying off every loan with a fixed monthly budget.
+
+    Each month every loan gets its minimum payment, and the extra amount plus the payments freed by loans already
+    paid off go to the loans in priority order.
+
+    Args:
+        balance (array): The current balances.
+        apr (array): The APRs in percent.
+        payment (array): The minimum monthly payments.
+        extra (float): The additional amount paid every month.
+        order (array): Loan indexes in priority order, defaults to the input order.
+        max_months (int): The longest simulation to run.
+
+    Returns:
+        dict: 'months' until every loan is paid off (inf if that takes more than max_months), 'total_interest',
+        and per-loan 'payoff_months' and 'interest' arrays.
+    """
+    remaining = np.array(balance, dtype=float)
+    rate = monthly_rate(apr)
+    minimum = np.asarray(payment, dtype=float)
+    order = np.arange(remaining.size) if order is None else np.asarray(order)
+    budget = minimum.sum() + extra
+
+    interest = np.zeros(remaining.size)
+    paid_off = np.where(remaining <= 0, 0.0, np.inf)
+    month = 0
+    while month < max_months and (remaining > 0).any():
+        month += 1
+        accrued = remaining * rate
+        remaining += accrued
+        interest += accrued
+
+        pay = np.minimum(minimum, remaining)
+        # Allocate what is left of the budget to the loans in priority order, each up to its remaining balance
+        room = (remaining - pay)[order]
+        spare = budget - pay.sum()
+        pay[order] += np.clip(spare - (np.cumsum(room) - room), 0, room)
+
+        remaining -= pay
+        finished = (remaining <= 1e-9) & ~np.isfinite(paid_off)
+        paid_off[finished] = month
+        remaining[remaining <= 1e-9] = 0
+
+    return {
+        'months': paid_off.max() if paid_off.size else 0.0,
+        'total_interest': interest.sum() if np.isfinite(paid_off).all() else np.inf,
+        'payoff_months': paid_off,
+        'interest': interest,
+    }
+
+
+def compare_strategies(balance, apr, payment, extra=0.0):
+    """
+    Compare paying only the minimums with the avalanche and snowball extra-payment strategies.
+
+    Avalanche sends the extra money to the highest APR first, snowball to the smallest balance first.
+
+    Returns:
+        dict: The simulate_payoff result for 'minimum', 'avalanche' and 'snowball'.
+    """
+    balance = np.asarray(balance, dtype=float)
+    apr = np.asarray(apr, dtype=float)
+    payments = months_to_payoff(balance, apr, payment)
+    interest = total_interest(balance, apr, payment)
+    return {
+        'minimum': {
+            'months': payments.max() if payments.size else 0.0,
+            'total_interest': interest.sum(),
+            'payoff_months': payments,
+            'interest': interest,
+        },
+        'avalanche': simulate_payoff(balance, apr, payment, extra, np.argsort(-apr, kind='stable')),
+        'snowball': simulate_payoff(balance, apr, payment, extra, np.argsort(balance, kind='stable')),
+    }
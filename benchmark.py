@@ -0,0 +1,324 @@
+"""Repeatable benchmarks of the hot paths, on synthetic data.
+
+For every size (10k, 100k and 1M transactions by default) the harness generates an OFX statement and a fresh
+database, then times parsing, importing, deduplication, categorization, reads, tab model builds and saves. Results are
+written as JSON so runs can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+
+Synthetic databases copy the base schema of the shipped database (--template) and are brought up to date by the
+regular migrations, so they match what the app runs against. Random data comes from a fixed seed, so every run
+benchmarks the same rows. Tab model builds need PySide6 and are skipped without it.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from database import Database, DB_PATH
+from migrations import migrate
+from repositories import TransactionsRepository, IncomeRepository, ExpensesRepository, LoansRepository, \
+    CategoriesRepository, TransactionFilter
+from ofx_reader import iter_ofx_transactions
+from importer import import_ofx, parse_ofx
+from categorizer import categorize_transactions
+from reports import Reports
+
+SIZES = (10_000, 100_000, 1_000_000)
+# ofxparse builds the whole document in memory and is far slower than the streaming reader, so it only runs on
+# sizes up to this one
+OFXPARSE_MAX_SIZE = 10_000
+MERCHANTS = 2000  # Distinct merchant names in the synthetic descriptions
+SAVED_ROWS = 1000  # Rows edited by the save benchmarks
+
+OFX_HEADER = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+SECURITY:NONE
+ENCODING:USASCII
+CHARSET:1252
+COMPRESSION:NONE
+OLDFILEUID:NONE
+NEWFILEUID:NONE
+
+<OFX><SIGNONMSGSRSV1><SONRS><STATUS><CODE>0<SEVERITY>INFO</STATUS><DTSERVER>20240101<LANGUAGE>ENG</SONRS>
+</SIGNONMSGSRSV1><BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO</STATUS><STMTRS><CURDEF>USD
+<BANKACCTFROM><BANKID>123456789<ACCTID>{account_id}<ACCTTYPE>CHECKING</BANKACCTFROM>
+<BANKTRANLIST><DTSTART>20150101<DTEND>20241231
+"""
+OFX_FOOTER = """</BANKTRANLIST><LEDGERBAL><BALAMT>0.00<DTASOF>20241231</LEDGERBAL></STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+
+def _merchant(index):
+    return f"Merchant {index:04d} Store"
+
+
+def generate_ofx(file_path, count, seed=0, account_id='12345678'):
+    """
+    Write a synthetic OFX bank statement.
+
+    Args:
+        file_path (str): The statement file to write.
+        count (int): The number of transactions.
+        seed (int): The random seed.
+        account_id (str): The account number of the statement.
+    """
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    with open(file_path, 'w') as file:
+        file.write(OFX_HEADER.format(account_id=account_id))
+        for fitid in range(count):
+            posted = start + timedelta(days=rng.randrange(3650))
+            income = rng.random() < 0.1
+            amount = rng.uniform(500, 5000) if income else -rng.uniform(1, 500)
+            file.write(f"<STMTTRN><TRNTYPE>{'CREDIT' if income else 'DEBIT'}"
+                       f"<DTPOSTED>{posted:%Y%m%d}120000[-5:EST]<TRNAMT>{amount:.2f}<FITID>{fitid}"
+                       f"<NAME>{_merchant(rng.randrange(MERCHANTS))}<MEMO>{_merchant(rng.randrange(MERCHANTS))} "
+                       f"#{rng.randrange(100000)}</STMTTRN>\n")
+        file.write(OFX_FOOTER)
+
+
+def generate_database(file_path, template=DB_PATH, seed=0):
+    """
+    Create an empty, fully migrated database with synthetic rules, income, expenses and loans.
+
+    Args:
+        file_path (str): The database file to create.
+        template (str): The database whose base schema is copied.
+        seed (int): The random seed.
+
+    Returns:
+        Database: An open connection to the new database.
+    """
+    with sqlite3.connect(f"file:{template}?mode=ro", uri=True) as source:
+        tables = source.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall()
+    # Virtual tables (the search index) and their shadow tables are left for the migrations to create
+    virtual = tuple(name + '_' for name, sql in tables if sql.upper().startswith('CREATE VIRTUAL'))
+    schema = [sql for name, sql in tables
+              if not name.startswith(('sqlite_',) + virtual) and not sql.upper().startswith('CREATE VIRTUAL')]
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    connection = sqlite3.connect(file_path)
+    for sql in schema:
+        connection.execute(sql)
+    connection.commit()
+    connection.close()
+
+    db = Database.open(file_path)
+    migrate(db.db_connection)
+
+    rng = random.Random(seed)
+    # A mix of exact, prefix and substring rules over the synthetic merchants
+    rules = []
+    for index in range(0, MERCHANTS, 4):
+        pattern = [_merchant(index) + '*', f"*{_merchant(index + 1)}*", _merchant(index + 2)][index % 3]
+        rules.append((pattern, f"Category {index % 40}"))
+    CategoriesRepository(db).create_many(rules)
+    IncomeRepository(db).create_many((f"Income {i}", round(rng.uniform(500, 3000), 2), rng.choice([1, 2]))
+                                     for i in range(5))
+    ExpensesRepository(db).create_many((f"Expense {i}", round(rng.uniform(10, 500), 2), rng.choice([1, 2, 4]))
+                                       for i in range(50))
+    LoansRepository(db).create_many(
+        (f"Loan {i}", round(rng.uniform(100, 600), 2), round(rng.uniform(1000, 30000), 2), '2020-01-01',
+         round(rng.uniform(2, 25), 2), '2024-11-01', '2024-12-01') for i in range(10))
+    return db
+
+
+class BenchmarkRunner:
+    """Times benchmarks and collects their results."""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+        self.statement_caches = []  # Database.statement_cache_stats() of every size, with its size
+
+    def run(self, size, name, function, repeat=None, setup=None):
+        """
+        Time a benchmark, keeping the fastest of its runs.
+
+        Args:
+            size (int): The number of transactions of the dataset.
+            name (str): The benchmark name.
+            function (callable): The code to time. Its return value, an int or a list, gives the row count.
+            repeat (int): The number of runs, defaults to the runner's. Pass 1 for benchmarks that change the data.
+            setup (callable): Called before every run, outside the timing.
+
+        Returns:
+            The return value of the last run.
+        """
+        times = []
+        result = None
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            result = function()
+            times.append(time.perf_counter() - start)
+        record = {
+            'size': size,
+            'benchmark': name,
+            'seconds': min(times),
+            'median_seconds': statistics.median(times),
+            'runs': len(times),
+        }
+        if isinstance(result, (int, list)):
+            record['rows'] = len(result) if isinstance(result, list) else result
+        self.results.append(record)
+        print(f"{size:>9,} {name:<32}{min(times) * 1000:10.1f} ms", flush=True)
+        return result
+
+
+def _model_benchmarks(runner, size, db):
+    try:
+        from ClassTransactionsTableModel import TransactionsTableModel
+        from ClassRecordTableModel import RecordTableModel
+    except ImportError:
+        print("PySide6 is not installed, skipping the tab model benchmarks")
+        return
+
+    transactions_model = TransactionsTableModel(TransactionsRepository(db))
+
+    def scroll():
+        # What scrolling through the first 20 pages fetches
+        for _ in range(20):
+            transactions_model.fetchMore()
+        return transactions_model.rowCount()
+
+    runner.run(size, 'load_transactions (first page)',
+               lambda: transactions_model.load() or transactions_model.rowCount())
+    runner.run(size, 'transactions model scroll', scroll, setup=transactions_model.load)
+
+    for name, repo, headers in [('load_income', IncomeRepository(db), 4), ('load_expenses', ExpensesRepository(db), 4),
+                                ('load_loans', LoansRepository(db), 8)]:
+        model = RecordTableModel(list(range(headers)), [str] * headers)
+        runner.run(size, name, lambda: model.load(repo.all()) or model.rowCount())
+
+    def save_categories():
+        transactions_model.load()
+        for row in range(min(SAVED_ROWS, transactions_model.rowCount())):
+            transactions_model.setData(transactions_model.index(row, TransactionsTableModel.CATEGORY_COLUMN),
+                                       f"Edited {row % 7}")
+        changed = transactions_model.dirty_rows()
+        TransactionsRepository(db).update_category_many((t[0], t[2]) for t in changed)
+        transactions_model.mark_clean()
+        return len(changed)
+
+    runner.run(size, 'transaction_save_changes', save_categories, repeat=1)
+
+
+def run_size(runner, size, workdir, template, seed):
+    """Generate the datasets of one size and run every benchmark on them."""
+    statement = os.path.join(workdir, f"statement_{size}.ofx")
+    database = os.path.join(workdir, f"finance_{size}.db")
+    generate_ofx(statement, size, seed)
+    db = generate_database(database, template, seed)
+    transactions_repo = TransactionsRepository(db)
+    categories_repo = CategoriesRepository(db)
+    reports = Reports(db)
+
+    parsed = runner.run(size, 'ofx parse (streaming)', lambda: list(iter_ofx_transactions(statement)))
+    if size <= OFXPARSE_MAX_SIZE:
+        runner.run(size, 'ofx parse (ofxparse)', lambda: len(parse_ofx(import_ofx(statement))), repeat=1)
+
+    runner.run(size, 'import', lambda: transactions_repo.import_many(parsed)[0], repeat=1)
+    runner.run(size, 'import duplicates (dedup)', lambda: transactions_repo.import_many(parsed)[1], repeat=1)
+
+    runner.run(size, 'categorize (full)', lambda: categorize_transactions(transactions_repo, categories_repo,
+                                                                          incremental=False), repeat=1)
+    runner.run(size, 'categorize (incremental, no-op)',
+               lambda: categorize_transactions(transactions_repo, categories_repo))
+
+    runner.run(size, 'TransactionsRepository.all()', transactions_repo.all)
+    halfway = transactions_repo.page(None, size // 2)[-1]
+    runner.run(size, 'page (keyset, halfway)', lambda: transactions_repo.page((halfway[2], halfway[0])))
+    runner.run(size, 'page (by amount, uncategorized)',
+               lambda: transactions_repo.page(None, 500, TransactionFilter(sort='amount', uncategorized=True)))
+    runner.run(size, 'search (one merchant)', lambda: len(transactions_repo.search(_merchant(42))))
+    runner.run(size, 'search (prefix, every row)', lambda: len(transactions_repo.search('merch')))
+
+    runner.run(size, 'load_dashboard (cash flow)', reports.monthly_cash_flow)
+    runner.run(size, 'category totals (all months)', reports.monthly_category_totals)
+    runner.run(size, 'load_budget', lambda: len(reports.monthly_budget_lines()) + bool(reports.monthly_budget()))
+
+    _model_benchmarks(runner, size, db)
+
+    income = IncomeRepository(db).all()
+    runner.run(size, 'income_update_changes', lambda: IncomeRepository(db).update_many(income) or len(income),
+               repeat=1)
+    ids = [row[0] for row in transactions_repo.page(None, SAVED_ROWS)]
+    runner.run(size, 'delete_many', lambda: transactions_repo.delete_many(ids) or len(ids), repeat=1)
+
+    statement_cache = db.statement_cache_stats()
+    runner.statement_caches.append(dict(statement_cache, size=size))
+    print(f"{size:>9,} {'statement cache hit rate':<32}{statement_cache['hit_rate']:10.1%}")
+    db.close()
+
+
+def environment():
+    return {
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, previous_path):
+    """Print how every benchmark changed against the results of an earlier run."""
+    with open(previous_path) as file:
+        previous = {(r['size'], r['benchmark']): r['seconds'] for r in json.load(file)['results']}
+    print(f"\nCompared with {previous_path}:")
+    for result in results:
+        before = previous.get((result['size'], result['benchmark']))
+        if before:
+            print(f"{result['size']:>9,} {result['benchmark']:<32}{result['seconds'] / before:8.2f}x")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the Finance Manager hot paths on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help="Transaction counts to benchmark")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs of every read-only benchmark, the fastest is reported (default 3)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--template', default=DB_PATH, help="The database whose base schema is copied")
+    parser.add_argument('--workdir', help="Where the synthetic files go, a temporary folder by default")
+    parser.add_argument('--keep', action='store_true', help="Keep the synthetic files")
+    parser.add_argument('--output', default='benchmark.json', help="The JSON results file")
+    parser.add_argument('--compare', metavar='JSON', help="Print the speedup against an earlier results file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='financemanager-benchmark-')
+    os.makedirs(workdir, exist_ok=True)
+
+    runner = BenchmarkRunner(args.repeat)
+    try:
+        for size in args.sizes:
+            run_size(runner, size, workdir, args.template, args.seed)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w') as file:
+        json.dump({'environment': environment(), 'results': runner.results,
+                   'statement_cache': runner.statement_caches}, file, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(runner.results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
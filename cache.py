@@ -0,0 +1,113 @@
+"""In-memory caches for data the UI reads far more often than it changes."""
+from database import table_version, write_count
+
+
+class CategoryCache:
+    """Sorted category names, loaded once and reloaded only when the Categories table changes.
+
+    Staleness is detected through CategoriesRepository.change_stamp(), which is cheap to query, so callers can ask
+    for names() as often as they like. generation increases every time the names are reloaded. fetch() and update()
+    split a check into its database read and its bookkeeping, so the read can run on a background thread.
+    """
+
+    def __init__(self, categories_repo):
+        self.categories_repo = categories_repo
+        self.generation = 0
+        self._names = None
+        self._stamp = None
+
+    def invalidate(self):
+        """Force the next names() call to reload."""
+        self._names = None
+
+    @property
+    def stamp(self):
+        """The change stamp the cached names were loaded at, None while nothing is cached."""
+        return None if self._names is None else self._stamp
+
+    @staticmethod
+    def fetch(categories_repo, stamp=None):
+        """
+        Read the current change stamp, and the names too unless they are still at the given stamp.
+
+        Only reads the repository, so it can run on another thread's connection, such as the database worker's.
+        Hand the result to update() on the thread that owns the cache.
+
+        Args:
+            categories_repo (CategoriesRepository): The repository to read from.
+            stamp: The stamp of the names the caller already has, usually the cache's stamp.
+
+        Returns:
+            tuple: The current change stamp, and the sorted names or None when they didn't change.
+        """
+        current = categories_repo.change_stamp()
+        return current, (None if current == stamp else categories_repo.names())
+
+    def update(self, stamp, names):
+        """Store the result of fetch(), keeping the cached names when it didn't reload them."""
+        if names is not None and (self._names is None or stamp != self._stamp):
+            self._names = names
+            self._stamp = stamp
+            self.generation += 1
+
+    def names(self):
+        """
+        Return the distinct category names, sorted case-insensitively.
+
+        Returns:
+            list: The category names. Treat it as read-only, it is shared between callers.
+        """
+        self.update(*self.fetch(self.categories_repo, self.stamp))
+        return self._names
+
+
+class TabCache:
+    """Remembers which version of its tables every tab last loaded, so switching back to an unchanged tab is free.
+
+    Writes made by this process are tracked per table through database.table_version(). Writes from other processes
+    (such as a folder import running alongside the app) only show up as a new PRAGMA data_version, which can't tell
+    tables apart, so they invalidate every tab. data_version also changes when this process writes through another
+    connection, such as the background worker's, so a data_version change is only treated as external when no
+    write of this process happened since the last check.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._loaded = {}  # Tab -> table versions it was loaded at
+        self._write_count = write_count()
+        self._data_version = db.data_version()
+
+    def _check_external_changes(self):
+        writes = write_count()
+        data_version = self.db.data_version()
+        if data_version != self._data_version and writes == self._write_count:
+            self._loaded.clear()
+        self._write_count = writes
+        self._data_version = data_version
+
+    def needs_load(self, tab, tables):
+        """
+        Check whether a tab has to be (re)loaded, and if so record it as loaded at the current table versions.
+
+        Args:
+            tab: The key of the tab, such as its index.
+            tables (tuple): The names of the tables the tab reads.
+
+        Returns:
+            bool: True when the tab was never loaded or one of its tables changed since, in which case the caller
+            must load it now.
+        """
+        self._check_external_changes()
+        # Taken before the load runs, so writes that race with the load trigger another one next time
+        versions = table_version(*tables)
+        if self._loaded.get(tab) == versions:
+            return False
+        self._loaded[tab] = versions
+        return True
+
+    def invalidate(self, tab=None):
+        """Force the next needs_load() of a tab, or of every tab, to return True."""
+        if tab is None:
+            self._loaded.clear()
+        else:
+            self._loaded.pop(tab, None)
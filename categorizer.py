@@ -0,0 +1,160 @@
+"""Rule-based auto-categorization of transactions.
+
+Every row of the Categories table is a rule: Name is the category to assign and Description is the pattern matched
+against transaction descriptions, case-insensitively:
+
+    Amazon Purchase     exact match
+    AMAZON*             description starts with "amazon"
+    *COFFEE*            description contains "coffee"
+
+Rules are loaded once and compiled into a hash table for exact rules, a character trie for prefix rules and a
+single combined regular expression for substring rules. An exact rule beats a prefix rule, which beats a substring
+rule; among prefix and substring rules the longest pattern wins.
+"""
+import re
+from database import normalize_description as _normalize
+
+
+def _parse_rule(pattern):
+    """Split a rule pattern into its kind ('exact', 'prefix' or 'substring') and its text."""
+    if len(pattern) > 2 and pattern.startswith('*') and pattern.endswith('*'):
+        return 'substring', pattern[1:-1]
+    elif len(pattern) > 1 and pattern.endswith('*'):
+        return 'prefix', pattern[:-1]
+    return 'exact', pattern
+
+
+class CategoryMatcher:
+    """Compiled matcher for a set of (pattern, category) rules."""
+
+    def __init__(self, rules):
+        self.exact = {}
+        self.prefix_trie = {}
+        substrings = {}
+        for pattern, category in rules:
+            if not pattern or not category:
+                continue
+            kind, text = _parse_rule(pattern)
+            if kind == 'substring':
+                substrings.setdefault(_normalize(text), category)
+            elif kind == 'prefix':
+                node = self.prefix_trie
+                for char in _normalize(text):
+                    node = node.setdefault(char, {})
+                node.setdefault(None, category)  # The None key marks the end of a prefix
+            else:
+                self.exact.setdefault(_normalize(text), category)
+
+        self.substrings = substrings
+        self.substring_regex = None
+        if substrings:
+            # Longest alternatives first, so the longest pattern wins when several match at the same position. The
+            # alternation sits in a lookahead, which consumes nothing, so every position of the text is tried and a
+            # short match can't hide a longer one that overlaps it.
+            alternatives = sorted(substrings, key=len, reverse=True)
+            self.substring_regex = re.compile('(?=(' + '|'.join(re.escape(a) for a in alternatives) + '))')
+
+    @classmethod
+    def from_repository(cls, categories_repo):
+        """Compile the rules stored in the Categories table."""
+        return cls(categories_repo.rules())
+
+    def match(self, description):
+        """
+        Find the category for a transaction description.
+
+        Args:
+            description (str): The transaction description.
+
+        Returns:
+            str: The matching category, or None when no rule matches.
+        """
+        if not description:
+            return None
+        text = _normalize(description)
+
+        category = self.exact.get(text)
+        if category is not None:
+            return category
+
+        node = self.prefix_trie
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            category = node.get(None, category)  # Deeper prefixes are longer, so they override
+        if category is not None:
+            return category
+
+        if self.substring_regex is not None:
+            matches = [m.group(1) for m in self.substring_regex.finditer(text)]
+            if matches:
+                return self.substrings[max(matches, key=len)]
+        return None
+
+
+# Above this many changed rules, rescanning every uncategorized row is cheaper than one LIKE term per rule
+MAX_CHANGED_RULE_FILTERS = 200
+
+
+def _like_pattern(pattern):
+    """
+    Translate a rule pattern into a LIKE pattern over normalize_description(description).
+
+    Both sides are normalized exactly as CategoryMatcher normalizes them, so the pattern matches every description
+    the rule matches (LIKE additionally ignoring ASCII case only ever adds candidates).
+    """
+    kind, text = _parse_rule(pattern)
+    escaped = re.sub(r'([\\%_])', r'\\\1', _normalize(text))
+    if kind == 'substring':
+        return f"%{escaped}%"
+    elif kind == 'prefix':
+        return f"{escaped}%"
+    return escaped
+
+
+def categorize_transactions(transactions_repo, categories_repo, incremental=True):
+    """
+    Categorize uncategorized transactions in one pass.
+
+    The rules are compiled once, each distinct description is matched only once, and all matches are written with a
+    single batched UPDATE. Incremental runs start from the high-water mark left by the previous run: transactions
+    added since then are matched against every rule, while older uncategorized transactions are only revisited when
+    their description could match a rule that was added or edited since then.
+
+    Args:
+        transactions_repo (TransactionsRepository): The transactions to categorize.
+        categories_repo (CategoriesRepository): The categorization rules.
+        incremental (bool): Pass False to rescan every uncategorized transaction.
+
+    Returns:
+        int: The number of transactions that were categorized.
+    """
+    with transactions_repo.db.transaction():
+        last_id, last_rules_version = categories_repo.categorization_state() if incremental else (0, 0)
+        rules_version = categories_repo.rules_version()
+        max_id = transactions_repo.max_id()
+
+        candidates = [transactions_repo.uncategorized(after_id=last_id, up_to_id=max_id)]
+        if last_id:
+            changed_rules = categories_repo.rules_changed_since(last_rules_version)
+            if len(changed_rules) > MAX_CHANGED_RULE_FILTERS:
+                candidates.append(transactions_repo.uncategorized(up_to_id=last_id))
+            elif changed_rules:
+                like_patterns = [_like_pattern(pattern) for pattern, category in changed_rules]
+                candidates.append(transactions_repo.uncategorized(up_to_id=last_id, like_patterns=like_patterns))
+
+        matcher = CategoryMatcher.from_repository(categories_repo)
+        matches = {}
+        changes = []
+        for rows in candidates:
+            for id, description in rows:
+                if description not in matches:
+                    matches[description] = matcher.match(description)
+                if matches[description] is not None:
+                    changes.append((id, matches[description]))
+
+        if changes:
+            transactions_repo.update_category_many(changes)
+        categories_repo.save_categorization_state(max_id, rules_version)
+    return len(changes)
@@ -0,0 +1,161 @@
+"""Headless command-line interface for scheduled jobs.
+
+Imports statements, categorizes transactions and prints reports without a display. This module, and everything it
+imports, must never import PySide6, so it starts in a fraction of a second and runs from cron on a server:
+
+    python cli.py import statements/            # every .ofx/.qfx file in the folder
+    python cli.py categorize
+    python cli.py report cash-flow --from 2024-01 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from database import Database, DB_PATH
+from repositories import TransactionsRepository, CategoriesRepository
+from importer import import_ofx, parse_ofx, insert_update_transactions, update_categories, find_statement_files, \
+    import_statement_files
+from categorizer import categorize_transactions
+from reports import Reports
+
+# Column headers of every report, in the order the Reports methods return them
+REPORT_HEADERS = {
+    'cash-flow': ['Month', 'Income', 'Expenses', 'Net', 'Balance'],
+    'categories': ['Month', 'Category', 'Total', 'Count'],
+    'budget': ['Type', 'Name', 'Monthly Amount'],
+}
+
+
+def statement_files(paths):
+    """Expand the command line paths into statement files, folders contributing every statement inside them."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(find_statement_files(path))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or folder: {path}")
+    return files
+
+
+def run_import(db, args):
+    transactions_repo = TransactionsRepository(db)
+    files = statement_files(args.paths)
+
+    if args.parser == 'ofxparse':
+        # One file at a time through ofxparse, for statements the streaming reader can't handle
+        total = 0
+        for file_path in files:
+            inserted, skipped = insert_update_transactions(transactions_repo, parse_ofx(import_ofx(file_path)))
+            print(f"{os.path.basename(file_path)}: {inserted} inserted, {skipped} skipped")
+            total += inserted
+    else:
+        reports = import_statement_files(transactions_repo, files, args.workers)
+        for report in reports:
+            print(f"{os.path.basename(report['file_path'])}: {report['inserted']} inserted, "
+                  f"{report['skipped']} skipped")
+        total = sum(report['inserted'] for report in reports)
+    print(f"{len(files)} files, {total} transactions imported")
+
+    if not args.no_categorize:
+        print(f"{update_categories(CategoriesRepository(db), transactions_repo)} transactions categorized")
+
+
+def run_categorize(db, args):
+    categorized = categorize_transactions(TransactionsRepository(db), CategoriesRepository(db),
+                                          incremental=not args.full)
+    print(f"{categorized} transactions categorized")
+
+
+def run_report(db, args):
+    reports = Reports(db)
+    if args.report == 'cash-flow':
+        rows = reports.monthly_cash_flow(args.start_month, args.end_month)
+    elif args.report == 'categories':
+        rows = reports.monthly_category_totals(args.start_month, args.end_month)
+    else:
+        rows = reports.monthly_budget_lines()
+    print_rows(REPORT_HEADERS[args.report], rows, args.format)
+
+
+def print_rows(headers, rows, output_format):
+    """
+    Print report rows to stdout.
+
+    Args:
+        headers (list): The column headers.
+        rows (list): The report rows, as tuples.
+        output_format (str): 'table' for aligned columns, 'csv', or 'json' for a list of objects.
+    """
+    if output_format == 'csv':
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        writer.writerow(headers)
+        writer.writerows(rows)
+    elif output_format == 'json':
+        json.dump([dict(zip(headers, row)) for row in rows], sys.stdout, indent=2)
+        print()
+    else:
+        cells = [headers] + [[str(value) for value in row] for row in rows]
+        widths = [max(len(row[column]) for row in cells) for column in range(len(headers))]
+        for row in cells:
+            print('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Finance Manager command line, runs without a display")
+    parser.add_argument('--db', default=DB_PATH, help=f"The database file (defaults to {DB_PATH})")
+    parser.add_argument('--profile-queries', metavar='FILE',
+                        help="Write statistics and query plans for every SQL statement to FILE as JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="Import .ofx/.qfx statements")
+    import_parser.add_argument('paths', nargs='+', metavar='PATH', help="Statement files or folders of statements")
+    import_parser.add_argument('--workers', type=int, default=None,
+                               help="Number of parser processes (defaults to the CPU count)")
+    import_parser.add_argument('--parser', choices=['stream', 'ofxparse'], default='stream',
+                               help="The fast streaming reader (default) or ofxparse, one file at a time")
+    import_parser.add_argument('--no-categorize', action='store_true',
+                               help="Don't categorize the imported transactions")
+    import_parser.set_defaults(run=run_import)
+
+    categorize_parser = commands.add_parser('categorize', help="Categorize uncategorized transactions")
+    categorize_parser.add_argument('--full', action='store_true',
+                                   help="Rescan every uncategorized transaction, not just what changed since the "
+                                        "last run")
+    categorize_parser.set_defaults(run=run_categorize)
+
+    report_parser = commands.add_parser('report', help="Print a report")
+    report_parser.add_argument('report', choices=sorted(REPORT_HEADERS))
+    report_parser.add_argument('--from', dest='start_month', metavar='YYYY-MM', help="The first month to include")
+    report_parser.add_argument('--to', dest='end_month', metavar='YYYY-MM', help="The last month to include")
+    report_parser.add_argument('--format', choices=['table', 'csv', 'json'], default='table')
+    report_parser.set_defaults(run=run_report)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        return 1
+
+    if args.profile_queries:
+        Database.enable_profiling()
+    db = Database.instance(args.db)
+    try:
+        args.run(db, args)
+    except FileNotFoundError as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+        if args.profile_queries:
+            Database.profiler.dump(args.profile_queries)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
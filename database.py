@@ -1,26 +1,282 @@
 # database.py
+import hashlib
+import re
 import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from migrations import migrate
+from query_profiler import QueryProfiler
+
+# The database file, relative to the working directory the app and the CLI are started from
+DB_PATH = "FinanceDB/FinanceManagerDB.db"
+
+# Connection pragmas applied when the database is opened. WAL lets readers run alongside the writer and turns each
+# commit into an append to the log, which makes synchronous=NORMAL safe (fsync at checkpoints, not every commit).
+PERFORMANCE_PROFILE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # Negative values are in KiB, so 64 MB of page cache
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Number of prepared statements sqlite3 keeps per connection. It has to hold every distinct query the repositories
+# issue, otherwise statements get evicted and re-parsed.
+STATEMENT_CACHE_SIZE = 256
+
+# Matches the table an INSERT, REPLACE, UPDATE or DELETE statement writes to
+_WRITE_STATEMENT = re.compile(r"\s*(?:(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(\w+)",
+                              re.IGNORECASE)
+
+# Write counters per (lowercase) table name, shared by every Database of this process, see table_version()
+_table_versions = {}
+_table_versions_lock = threading.Lock()
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _written_table(query):
+    match = _WRITE_STATEMENT.match(query)
+    return match.group(1).lower() if match else None
+
+
+def _record_write(query, cursor):
+    table = _written_table(query)
+    if table is not None and cursor.rowcount != 0:
+        with _table_versions_lock:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+def table_version(*tables):
+    """
+    Return the write counters of tables, which every INSERT, UPDATE or DELETE that changes rows through
+    execute_query or execute_many bumps, on any connection of this process. Rows changed by triggers don't count
+    towards their own table, so depend on the table the statement wrote.
+
+    Args:
+        *tables (str): The table names, case-insensitive.
+
+    Returns:
+        tuple: One counter per table. Two results differ if any of the tables was written in between.
+    """
+    with _table_versions_lock:
+        return tuple(_table_versions.get(table.lower(), 0) for table in tables)
+
+
+def write_count():
+    """Return the total number of counted writes of this process, to tell its own writes from other processes'."""
+    with _table_versions_lock:
+        return sum(_table_versions.values())
+
+
+def configure_connection(connection, profile=None):
+    """
+    Apply a performance profile to a SQLite connection.
+
+    Args:
+        connection (sqlite3.Connection): The connection to configure.
+        profile (dict): Pragma names mapped to values, defaults to PERFORMANCE_PROFILE. Pass an empty dict to keep
+            SQLite's defaults.
+    """
+    if profile is None:
+        profile = PERFORMANCE_PROFILE
+    for pragma, value in profile.items():
+        connection.execute(f"PRAGMA {pragma} = {value}")
+
+
+def transaction_fingerprint(account_id, date, amount, description):
+    """
+    Compute the content hash used to recognize a transaction that is already stored.
+
+    It leaves the OFX FITID out, which is kept in its own column, so a row matches whether or not it came with one.
+
+    Args:
+        account_id (str): The account number/ID of the statement.
+        date (str): The transaction date.
+        amount (float): The transaction amount.
+        description (str): The transaction description.
+
+    Returns:
+        str: A hex SHA-1 digest of the normalized fields.
+    """
+    fields = (str(account_id), str(date), f"{float(amount):.2f}", description or '')
+    return hashlib.sha1('\x1f'.join(fields).encode('utf-8')).hexdigest()
+
+
+def normalize_description(text):
+    """
+    Normalize a description or rule text for case-insensitive matching.
+
+    Registered on every connection as the SQL function normalize_description(), so a query can filter on exactly
+    the text the categorizer matches against.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The text with runs of whitespace collapsed to one space, stripped and case-folded, or None for None.
+    """
+    if text is None:
+        return None
+    return ' '.join(text.split()).casefold()
+
 
 class Database:
     _instance = None
+    profiler = None  # A QueryProfiler shared by every connection while query profiling is on
 
     @classmethod
-    def instance(cls, db_path):
+    def enable_profiling(cls, explain=True):
+        """
+        Start recording statistics for every statement run through execute_query and execute_many.
+
+        Args:
+            explain (bool): Capture each query's EXPLAIN QUERY PLAN the first time it runs, to flag full table scans.
+
+        Returns:
+            QueryProfiler: The profiler collecting the statistics, the existing one if profiling was already on.
+        """
+        if Database.profiler is None:
+            Database.profiler = QueryProfiler(explain)
+        return Database.profiler
+
+    @classmethod
+    def disable_profiling(cls):
+        """Stop recording statement statistics and return the profiler that collected them, if any."""
+        profiler, Database.profiler = Database.profiler, None
+        return profiler
+
+    @classmethod
+    def instance(cls, db_path, profile=None):
         if cls._instance is None:
-            cls._instance = cls(db_path)
+            cls._instance = cls(db_path, profile)
+            # Bring the schema up to date before anything else touches it
+            migrate(cls._instance.db_connection)
         return cls._instance
 
-    def __init__(self, db_path):
+    @classmethod
+    def open(cls, db_path, profile=None):
+        """
+        Open a separate connection alongside the shared instance, for a thread that needs its own connection.
+
+        Args:
+            db_path (str): The database file, which the shared instance has already migrated.
+            profile (dict): The pragma profile, defaults to PERFORMANCE_PROFILE.
+
+        Returns:
+            Database: A new Database that is not the shared instance. SQLite connections can only be used on the
+            thread that opened them, so call this from the thread that will use it.
+        """
+        database = cls.__new__(cls)
+        database._connect(db_path, profile)
+        return database
+
+    def __init__(self, db_path, profile=None):
         if self._instance is not None:
             raise Exception("This class is a singleton!")
-        self.db_connection = sqlite3.connect(db_path)
+        self._connect(db_path, profile)
         self._instance = self
 
+    def _connect(self, db_path, profile):
+        self.db_path = db_path
+        self.profile = profile
+        self.db_connection = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
+        configure_connection(self.db_connection, profile)
+        self._transaction_depth = 0
+        self._cached_statements = OrderedDict()
+        self.statement_cache_hits = 0
+        self.statement_cache_misses = 0
+        self.db_connection.create_function('transaction_fingerprint', 4, transaction_fingerprint,
+                                           deterministic=True)
+        self.db_connection.create_function('normalize_description', 1, normalize_description, deterministic=True)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group every statement executed inside the block into a single commit.
+
+        Transactions nest: only the outermost block commits, and an exception escaping it rolls the whole group
+        back.
+        """
+        if self._transaction_depth == 0:
+            self.db_connection.execute("BEGIN")
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.db_connection.rollback()
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self.db_connection.commit()
+
+    def _statement_scope(self):
+        # Outside transaction() every statement commits on its own, inside it the outermost block commits
+        return nullcontext() if self._transaction_depth else self.db_connection
+
+    def _track_statement(self, query):
+        # sqlite3 doesn't report on its statement cache, so mirror it (an LRU keyed on the SQL text) to count hits
+        if query in self._cached_statements:
+            self._cached_statements.move_to_end(query)
+            self.statement_cache_hits += 1
+        else:
+            self._cached_statements[query] = None
+            if len(self._cached_statements) > STATEMENT_CACHE_SIZE:
+                self._cached_statements.popitem(last=False)
+            self.statement_cache_misses += 1
+
+    def statement_cache_stats(self):
+        """
+        Report how well the prepared statement cache is doing.
+
+        Returns:
+            dict: The cache size, hit and miss counts, and the hit rate between 0 and 1.
+        """
+        lookups = self.statement_cache_hits + self.statement_cache_misses
+        return {
+            'size': STATEMENT_CACHE_SIZE,
+            'hits': self.statement_cache_hits,
+            'misses': self.statement_cache_misses,
+            'hit_rate': self.statement_cache_hits / lookups if lookups else 0.0,
+        }
+
+    def data_version(self):
+        """Return SQLite's data_version, which changes whenever another connection commits to the database."""
+        return self.db_connection.execute("PRAGMA data_version").fetchone()[0]
+
     def execute_query(self, query, parameters=()):
-        with self.db_connection:
+        self._track_statement(query)
+        with self._statement_scope():
+            cursor = self.db_connection.cursor()
+            profiler = Database.profiler
+            if profiler is not None:
+                cursor = profiler.execute(self.db_connection, cursor, query, parameters)
+            else:
+                cursor.execute(query, parameters)
+            _record_write(query, cursor)
+            return cursor
+
+    def execute_many(self, query, seq_of_parameters):
+        self._track_statement(query)
+        with self._statement_scope():
             cursor = self.db_connection.cursor()
-            cursor.execute(query, parameters)
+            profiler = Database.profiler
+            if profiler is not None:
+                profiler.execute_many(self.db_connection, cursor, query, seq_of_parameters)
+            else:
+                cursor.executemany(query, seq_of_parameters)
+            _record_write(query, cursor)
             return cursor
 
     def close(self):
+        # Keep the planner's statistics current, analyzing a bounded sample of any table that needs it. This is best
+        # effort: the connection may already be closed, or another connection may hold the write lock.
+        try:
+            self.db_connection.execute("PRAGMA analysis_limit = 1000")
+            self.db_connection.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
         self.db_connection.close()
@@ -0,0 +1,121 @@
+"""Cash-flow forecast of the account balance from the recurring income, expenses and loans.
+
+Income and expense entries contribute Amount * Frequency every month (Frequency is stored as occurrences per month),
+and every loan contributes its monthly payment until the amortization schedule pays it off.
+
+The Monte Carlo mode perturbs each income and expense entry independently every month by a normally distributed
+fraction of its amount. A sum of independent normals is itself normal, so every month needs just one draw for total
+income and one for total expenses, with a standard deviation of volatility * sqrt(sum of squared amounts). The draws
+for all scenarios and months are generated as (scenarios, months) arrays, in chunks that can run in a process pool.
+Every chunk has its own seed spawned from the forecast seed, so results don't depend on the number of workers.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import amortization
+
+PERCENTILES = (10, 50, 90)
+# Scenarios simulated per chunk, which bounds memory to a few (chunk, months) arrays
+SCENARIO_CHUNK = 1000
+
+
+def _monthly_amounts(records):
+    # Income and Expenses rows are (ID, Name, Amount, Frequency)
+    return np.array([record[2] * record[3] for record in records], dtype=float)
+
+
+def loan_payments(loans, months):
+    """
+    Total the loan payments due every month until each loan is paid off.
+
+    Args:
+        loans (list): Loans rows, as returned by LoansRepository.all().
+        months (int): The number of months to project.
+
+    Returns:
+        array: The total loan payment of each month.
+    """
+    payments = np.zeros(months)
+    if loans:
+        schedule = amortization.schedules(*amortization.loan_arrays(loans), max_months=months)['payment']
+        payments[:schedule.shape[1]] = schedule.sum(axis=0)
+    return payments
+
+
+def simulate_balances(seed, scenarios, start_balance, income, income_std, expenses, expenses_std, loan_payments):
+    """
+    Simulate the monthly balance of a chunk of scenarios. Runs inside a worker process in pool mode.
+
+    Args:
+        seed (np.random.SeedSequence): The seed of this chunk.
+        scenarios (int): The number of scenarios to simulate.
+        start_balance (float): The balance before the first month.
+        income (float): The expected monthly income.
+        income_std (float): The standard deviation of the monthly income.
+        expenses (float): The expected monthly expenses.
+        expenses_std (float): The standard deviation of the monthly expenses.
+        loan_payments (array): The loan payments of each month.
+
+    Returns:
+        array: The balances, of shape (scenarios, months).
+    """
+    rng = np.random.default_rng(seed)
+    shape = (scenarios, len(loan_payments))
+    net = np.maximum(income + income_std * rng.standard_normal(shape), 0)
+    net -= np.maximum(expenses + expenses_std * rng.standard_normal(shape), 0)
+    net -= loan_payments
+    return start_balance + np.cumsum(net, axis=1)
+
+
+def forecast(start_balance, income, expenses, loans, years=10, scenarios=0, income_volatility=0.05,
+             expense_volatility=0.10, percentiles=PERCENTILES, seed=None, max_workers=None):
+    """
+    Project the account balance month by month.
+
+    Args:
+        start_balance (float): The current balance.
+        income (list): Income rows, as returned by IncomeRepository.all().
+        expenses (list): Expenses rows, as returned by ExpensesRepository.all().
+        loans (list): Loans rows, as returned by LoansRepository.all().
+        years (int): How far to project, from 1 to 30 years.
+        scenarios (int): The number of Monte Carlo scenarios, or 0 for the deterministic projection only.
+        income_volatility (float): The standard deviation of each income entry, as a fraction of its amount.
+        expense_volatility (float): The standard deviation of each expense entry, as a fraction of its amount.
+        percentiles (tuple): The percentile bands to return.
+        seed (int): The random seed, for reproducible forecasts.
+        max_workers (int): Simulate the scenario chunks in a process pool with this many workers. None or 1 runs
+            them in this process.
+
+    Returns:
+        dict: 'balance', the deterministic balance at the end of every month, and with scenarios a 'percentiles'
+        dict mapping every percentile to its balance band.
+    """
+    if not 1 <= years <= 30:
+        raise ValueError("The forecast horizon must be between 1 and 30 years")
+    months = years * 12
+
+    income_amounts = _monthly_amounts(income)
+    expense_amounts = _monthly_amounts(expenses)
+    payments = loan_payments(loans, months)
+    result = {
+        'balance': start_balance + np.cumsum(income_amounts.sum() - expense_amounts.sum() - payments),
+    }
+    if not scenarios:
+        return result
+
+    arguments = (start_balance, income_amounts.sum(), income_volatility * np.sqrt(np.square(income_amounts).sum()),
+                 expense_amounts.sum(), expense_volatility * np.sqrt(np.square(expense_amounts).sum()), payments)
+    chunks = [min(SCENARIO_CHUNK, scenarios - start) for start in range(0, scenarios, SCENARIO_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    if max_workers is None or max_workers <= 1:
+        balances = [simulate_balances(s, n, *arguments) for s, n in zip(seeds, chunks)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(simulate_balances, s, n, *arguments) for s, n in zip(seeds, chunks)]
+            balances = [future.result() for future in futures]
+
+    bands = np.percentile(np.concatenate(balances), percentiles, axis=0)
+    result['percentiles'] = dict(zip(percentiles, bands))
+    return result
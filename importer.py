@@ -0,0 +1,103 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ofx_reader import iter_ofx_transactions
+from categorizer import categorize_transactions
+
+STATEMENT_EXTENSIONS = ('.ofx', '.qfx')
+
+
+def import_ofx(file_path):
+    # ofxparse (and BeautifulSoup behind it) is slow to import, and the streaming reader covers the usual paths
+    from ofxparse import OfxParser
+    with open(file_path) as file:
+        ofx = OfxParser.parse(file)
+    return ofx
+
+
+def parse_ofx(ofx):
+    transactions = []
+    for account in ofx.accounts:
+        for transaction in account.statement.transactions:
+            transactions.append({
+                'account_id': account.account_id,  # Add account number/ID
+                'date': transaction.date.strftime('%Y-%m-%d'),
+                'amount': float(transaction.amount),
+                'description': transaction.memo or transaction.payee,
+                'category': None,
+                'fitid': transaction.id,
+            })
+    return transactions
+
+
+def insert_update_transactions(transactions_repo, transactions):
+    # Bulk insert in one database transaction, returns (inserted, skipped)
+    return transactions_repo.import_many(transactions)
+
+
+def update_categories(categories_repo, transactions_repo):
+    # Compile the Categories rules once and categorize every uncategorized transaction in one batched update
+    return categorize_transactions(transactions_repo, categories_repo)
+
+
+def find_statement_files(folder):
+    """
+    List the statement files in a folder.
+
+    Args:
+        folder (str): The folder to scan (not recursive).
+
+    Returns:
+        list: Sorted paths of the .ofx and .qfx files in the folder.
+    """
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(STATEMENT_EXTENSIONS))
+
+
+def parse_statement_file(file_path):
+    """
+    Parse a single statement file. Runs inside a worker process, so it must stay free of database and Qt state.
+
+    Args:
+        file_path (str): The path of the statement file.
+
+    Returns:
+        tuple: The file path, the list of parsed transaction dicts and the parse time in seconds.
+    """
+    start = time.perf_counter()
+    transactions = list(iter_ofx_transactions(file_path))
+    return file_path, transactions, time.perf_counter() - start
+
+
+def import_statement_files(transactions_repo, file_paths, max_workers=None):
+    """
+    Parse statement files concurrently in a process pool and write them through a single writer.
+
+    Parsing is CPU-bound and runs in the workers; every result is funneled back to this process, which owns the
+    SQLite connection and imports the files one at a time as they finish.
+
+    Args:
+        transactions_repo (TransactionsRepository): The repository used to write the transactions.
+        file_paths (list): The statement files to import.
+        max_workers (int): The number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+        list: One dict per file with file_path, parsed, inserted, skipped, parse_seconds and write_seconds keys,
+        in completion order.
+    """
+    reports = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(parse_statement_file, file_path) for file_path in file_paths]
+        for future in as_completed(futures):
+            file_path, transactions, parse_seconds = future.result()
+            start = time.perf_counter()
+            inserted, skipped = transactions_repo.import_many(transactions)
+            reports.append({
+                'file_path': file_path,
+                'parsed': len(transactions),
+                'inserted': inserted,
+                'skipped': skipped,
+                'parse_seconds': parse_seconds,
+                'write_seconds': time.perf_counter() - start,
+            })
+    return reports
@@ -1,50 +1,38 @@
+import time
+STARTED = time.perf_counter()  # Taken before any other import, for --profile-startup
+
+import argparse
+import os
 import sys
-import sqlite3
 from PySide6 import QtWidgets
-from database import Database
-from repositories import TransactionsRepository, IncomeRepository, ExpensesRepository, LoansRepository, \
-    AssetsRepository, CategoriesRepository
-from ofxparse import OfxParser
-from ClassMainWindow import MainWindow
-
-
-def import_ofx(file_path):
-    with open(file_path) as file:
-        ofx = OfxParser.parse(file)
-    return ofx
-
-
-def parse_ofx(ofx):
-    transactions = []
-    for account in ofx.accounts:
-        for transaction in account.statement.transactions:
-            transactions.append({
-                'account_id': account.account_id,  # Add account number/ID
-                'date': transaction.date,
-                'amount': transaction.amount,
-                'description': transaction.memo,
-                'category': None,
-            })
-    return transactions
-
-
-def insert_update_transactions(transactions_repo, transactions):
-    for transaction in transactions:
-        existing_transaction = transactions_repo.read_by_description_and_date(transaction['description'],
-                                                                              transaction['date'])
-        if not existing_transaction:
-            transactions_repo.create(transaction['account_id'], transaction['date'], transaction['amount'],
-                                     transaction['description'], transaction['category'])
-
-
-def update_categories(categories_repo, transactions_repo):
-    transactions = transactions_repo.all()
-    for transaction in transactions:
-        if transaction['category'] is None:
-            category = categories_repo.read_by_description(transaction['description'])
-            if category:
-                transactions_repo.update(transaction['id'], transaction['account_id'], transaction['date'],
-                                         transaction['amount'], transaction['description'], category['category'])
+from database import Database, DB_PATH
+from repositories import TransactionsRepository, CategoriesRepository
+from ofx_reader import iter_ofx_transactions
+# The import helpers live in the Qt-free importer module so the headless CLI (cli.py) can share them
+from importer import insert_update_transactions, update_categories, find_statement_files, import_statement_files
+
+IMPORTED = time.perf_counter()
+
+
+class StartupProfile:
+    """Times the phases of application startup for --profile-startup."""
+
+    def __init__(self, started):
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, phase, now=None):
+        """Record that a phase ended now, or at the given perf_counter() time, and began where the last one ended."""
+        now = time.perf_counter() if now is None else now
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        print("Startup profile:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<24}{seconds * 1000:8.1f} ms")
+        print(f"  {'total':<24}{(self.last - self.started) * 1000:8.1f} ms")
 
 
 def show_warning_dialog():
@@ -55,17 +43,77 @@ def show_warning_dialog():
     return warning_dialog.exec_()
 
 
+def show_import_summary(inserted, skipped):
+    summary_dialog = QtWidgets.QMessageBox(QtWidgets.QMessageBox.Information,
+                                           "Import Complete",
+                                           f"Imported {inserted} transactions, skipped {skipped} duplicates.",
+                                           QtWidgets.QMessageBox.Ok)
+    return summary_dialog.exec_()
+
+
 def open_file_dialog():
     file_dialog = QtWidgets.QFileDialog()
     file_dialog.setFileMode(QtWidgets.QFileDialog.ExistingFile)
-    file_dialog.setNameFilters(["OFX files (*.ofx)"])
+    file_dialog.setNameFilters(["OFX files (*.ofx *.qfx)"])
     if file_dialog.exec_():
         return file_dialog.selectedFiles()[0]
     return None
 
 
+def import_folder(folder, max_workers=None):
+    db = Database.instance(DB_PATH)
+
+    reports = import_statement_files(TransactionsRepository(db), find_statement_files(folder), max_workers)
+    for report in reports:
+        print(f"{os.path.basename(report['file_path'])}: {report['parsed']} parsed, {report['inserted']} inserted, "
+              f"{report['skipped']} skipped (parse {report['parse_seconds']:.2f}s, "
+              f"write {report['write_seconds']:.2f}s)")
+    print(f"{len(reports)} files, {sum(r['inserted'] for r in reports)} transactions imported")
+
+    db.close()
+
+
+def dump_query_profile(file_path):
+    # Profiling may also have been switched on or off from the Query Diagnostics dialog
+    if file_path and Database.profiler is not None:
+        Database.profiler.dump(file_path)
+        print(f"Query profile written to {file_path}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Finance Manager")
+    parser.add_argument('--import-folder', metavar='FOLDER',
+                        help="Import every .ofx/.qfx file in FOLDER in parallel and exit")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of parser processes for --import-folder (defaults to the CPU count)")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Print how long imports, window construction and the first paint took")
+    parser.add_argument('--profile-queries', metavar='FILE',
+                        help="Record statistics and query plans for every SQL statement and write them to FILE as "
+                             "JSON on exit")
+    # Leave any remaining arguments for Qt
+    return parser.parse_known_args(argv)
+
+
 def main():
-    app = QtWidgets.QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv[1:])
+
+    if args.profile_queries:
+        Database.enable_profiling()
+
+    if args.import_folder:
+        import_folder(args.import_folder, args.workers)
+        dump_query_profile(args.profile_queries)
+        return
+
+    profile = StartupProfile(STARTED)
+    profile.mark("module imports", IMPORTED)
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    profile.mark("QApplication")
+    # The window pulls in every model and the generated UI, so it is imported once there is an application for it
+    from ClassMainWindow import MainWindow
+    profile.mark("MainWindow import")
 
     skip_dialog = True
 
@@ -79,17 +127,14 @@ def main():
         # If a file is selected, load the main application
         if file_path:
             # Initialize the Singleton database connection
-            db_path = "FinanceDB/FinanceManagerDB.db"
-            db = Database.instance(db_path)
-
-            # Import .OFX file
-            ofx = import_ofx(file_path)
+            db = Database.instance(DB_PATH)
 
-            # Parse the .OFX file and get transaction data.
-            transactions = parse_ofx(ofx)
+            # Stream transactions out of the .OFX file without building the whole document
+            transactions = iter_ofx_transactions(file_path)
 
             # Insert or update transactions.
-            insert_update_transactions(TransactionsRepository(db), transactions)
+            inserted, skipped = insert_update_transactions(TransactionsRepository(db), transactions)
+            show_import_summary(inserted, skipped)
             update_categories(CategoriesRepository(db), TransactionsRepository(db))
 
             window = MainWindow(db)
@@ -102,15 +147,22 @@ def main():
             sys.exit()
     else:
         # Initialize the Singleton database connection
-        db_path = "FinanceDB/FinanceManagerDB.db"
-        db = Database.instance(db_path)
+        db = Database.instance(DB_PATH)
+        profile.mark("database open")
 
         window = MainWindow(db)
+        profile.mark("MainWindow build")
         window.show()
+        # Let the window paint once before reporting
+        app.processEvents()
+        profile.mark("first paint")
+        if args.profile_startup:
+            profile.report()
         app.exec()
 
         # Don't forget to close the database connection when you're done
         db.close()
+        dump_query_profile(args.profile_queries)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,216 @@
+"""Versioned schema migrations for the Finance Manager database.
+
+The schema version is stored in SQLite's PRAGMA user_version. Every entry in MIGRATIONS upgrades the schema by
+one version, so migration N (1-based) brings a database from version N - 1 to N. Append new migrations to the end of
+the list; never edit or reorder one that has already shipped.
+"""
+import sqlite3
+from datetime import datetime
+
+
+def _add_transaction_fingerprint(connection):
+    # Import deduplication keys. fingerprint hashes a row's content without its FITID, and every row carries one so
+    # an imported row is recognized whether or not either side has a FITID. It isn't unique, since two genuine,
+    # identical transactions (two coffees on the same day) are both kept. fitid holds the OFX FITID of imported
+    # rows and is unique per account.
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(transactions)")]
+    if 'fingerprint' not in columns:
+        connection.execute("ALTER TABLE transactions ADD COLUMN fingerprint TEXT")
+    if 'fitid' not in columns:
+        connection.execute("ALTER TABLE transactions ADD COLUMN fitid TEXT")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions(fingerprint)")
+    connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_account_fitid "
+                       "ON transactions(account_id, fitid)")
+    connection.execute("UPDATE transactions SET fingerprint = transaction_fingerprint(account_id, date, amount, "
+                       "description)")
+
+
+def _add_transaction_indexes(connection):
+    # Secondary indexes for reports by month, by account and by category
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions(account_id, date)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category)")
+
+
+# Trigger statements counting a change to the Categories rules and stamping the changed rule with the new count
+_RULE_CHANGED = "UPDATE categorization_state SET rule_changes = rule_changes + 1 WHERE id = 1;"
+_STAMP_RULE = ("UPDATE Categories SET Version = (SELECT rule_changes FROM categorization_state WHERE id = 1) "
+               "WHERE ID = NEW.ID;")
+
+
+def _add_categorization_state(connection):
+    # categorization_state records how far the last categorization run got (last_transaction_id, and rules_version,
+    # the rule_changes it covered). rule_changes counts every insert, edit and delete of a rule and only ever goes up,
+    # even when the newest rule is deleted, and every rule carries the count at which it was last added or edited.
+    # Triggers keep both current, so hand edits count too.
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(Categories)")]
+    if 'Version' not in columns:
+        connection.execute("ALTER TABLE Categories ADD COLUMN Version INTEGER NOT NULL DEFAULT 0")
+    connection.execute("CREATE TABLE IF NOT EXISTS categorization_state ("
+                       "id INTEGER PRIMARY KEY CHECK (id = 1), "
+                       "last_transaction_id INTEGER NOT NULL, "
+                       "rules_version INTEGER NOT NULL, "
+                       "rule_changes INTEGER NOT NULL)")
+    connection.execute("INSERT OR IGNORE INTO categorization_state (id, last_transaction_id, rules_version, "
+                       "rule_changes) VALUES (1, 0, 0, 0)")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS categories_change_insert AFTER INSERT ON Categories BEGIN "
+                       f"{_RULE_CHANGED} {_STAMP_RULE} END")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS categories_change_update "
+                       "AFTER UPDATE OF Name, Description ON Categories BEGIN "
+                       f"{_RULE_CHANGED} {_STAMP_RULE} END")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS categories_change_delete AFTER DELETE ON Categories BEGIN "
+                       f"{_RULE_CHANGED} END")
+
+
+def _normalize_transaction_dates(connection):
+    # Rewrite legacy M/D/YYYY dates as ISO YYYY-MM-DD, so dates sort correctly and substr(date, 1, 7) is the month
+    rows = connection.execute("SELECT id, date FROM transactions WHERE date LIKE '%/%/%'").fetchall()
+    updates = []
+    for id, date in rows:
+        try:
+            updates.append((datetime.strptime(date, '%m/%d/%Y').strftime('%Y-%m-%d'), id))
+        except ValueError:
+            pass  # Leave dates we can't parse untouched
+    # The fingerprint hashes the date, so recompute it too or re-importing these rows would no longer be recognized
+    connection.executemany("UPDATE transactions "
+                           "SET date = ?1, fingerprint = transaction_fingerprint(account_id, ?1, amount, description) "
+                           "WHERE id = ?2", updates)
+
+
+# The summary key of a transaction row (NEW or OLD inside a trigger)
+_SUMMARY_MONTH = "substr({row}.date, 1, 7)"
+_SUMMARY_CATEGORY = "COALESCE(NULLIF({row}.category, ''), 'Uncategorized')"
+
+
+def _summary_add(row):
+    return (f"INSERT INTO monthly_category_totals (month, category, total, income, expenses, count) "
+            f"VALUES ({_SUMMARY_MONTH.format(row=row)}, {_SUMMARY_CATEGORY.format(row=row)}, {row}.amount, "
+            f"MAX({row}.amount, 0), MAX(-{row}.amount, 0), 1) "
+            f"ON CONFLICT (month, category) DO UPDATE SET total = total + excluded.total, "
+            f"income = income + excluded.income, expenses = expenses + excluded.expenses, count = count + 1;")
+
+
+def _summary_remove(row):
+    key = (f"month = {_SUMMARY_MONTH.format(row=row)} AND category = {_SUMMARY_CATEGORY.format(row=row)}")
+    return (f"UPDATE monthly_category_totals SET total = total - {row}.amount, "
+            f"income = income - MAX({row}.amount, 0), expenses = expenses - MAX(-{row}.amount, 0), "
+            f"count = count - 1 WHERE {key}; "
+            f"DELETE FROM monthly_category_totals WHERE {key} AND count <= 0;")
+
+
+def _add_monthly_summary(connection):
+    # Pre-aggregated totals per month and category, kept current by triggers so every write path (including
+    # INSERT OR IGNORE imports, which only fire for rows actually inserted) updates it incrementally
+    connection.execute("CREATE TABLE IF NOT EXISTS monthly_category_totals ("
+                       "month TEXT NOT NULL, "
+                       "category TEXT NOT NULL, "
+                       "total REAL NOT NULL, "
+                       "income REAL NOT NULL, "
+                       "expenses REAL NOT NULL, "
+                       "count INTEGER NOT NULL, "
+                       "PRIMARY KEY (month, category)) WITHOUT ROWID")
+    connection.execute("DELETE FROM monthly_category_totals")
+    connection.execute("INSERT INTO monthly_category_totals (month, category, total, income, expenses, count) "
+                       f"SELECT {_SUMMARY_MONTH.format(row='t')}, {_SUMMARY_CATEGORY.format(row='t')}, "
+                       "SUM(t.amount), SUM(MAX(t.amount, 0)), SUM(MAX(-t.amount, 0)), COUNT(*) "
+                       "FROM transactions AS t GROUP BY 1, 2")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS transactions_summary_insert AFTER INSERT ON transactions BEGIN "
+                       f"{_summary_add('NEW')} END")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS transactions_summary_delete AFTER DELETE ON transactions BEGIN "
+                       f"{_summary_remove('OLD')} END")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS transactions_summary_update "
+                       "AFTER UPDATE OF date, amount, category ON transactions BEGIN "
+                       f"{_summary_remove('OLD')} {_summary_add('NEW')} END")
+
+
+# Trigger statements keeping the search index in step with a transaction row (an FTS5 'delete' needs the old values)
+_FTS_ADD = "INSERT INTO transactions_fts (rowid, description, category) VALUES (NEW.id, NEW.description, NEW.category);"
+_FTS_REMOVE = ("INSERT INTO transactions_fts (transactions_fts, rowid, description, category) "
+               "VALUES ('delete', OLD.id, OLD.description, OLD.category);")
+
+
+def _add_transaction_search(connection):
+    # FTS5 index over the description and category of every transaction. It is an external content table (the text
+    # lives only in transactions), kept in sync by triggers so every write path, imports included, updates it.
+    try:
+        connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5("
+                           "description, category, content='transactions', content_rowid='id', "
+                           "tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    except sqlite3.OperationalError:
+        return  # SQLite was built without FTS5, TransactionsRepository.search() falls back to LIKE
+    connection.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+    # Rank description matches above category matches
+    connection.execute("INSERT INTO transactions_fts (transactions_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)')")
+    # Indexing row by row from a trigger is several times slower than indexing a batch in one statement, so bulk
+    # imports set deferred inside their transaction and index the new rows themselves before committing
+    connection.execute("CREATE TABLE IF NOT EXISTS search_index_state ("
+                       "id INTEGER PRIMARY KEY CHECK (id = 1), "
+                       "deferred INTEGER NOT NULL)")
+    connection.execute("INSERT OR IGNORE INTO search_index_state (id, deferred) VALUES (1, 0)")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions "
+                       f"WHEN (SELECT deferred FROM search_index_state) = 0 BEGIN {_FTS_ADD} END")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN "
+                       f"{_FTS_REMOVE} END")
+    connection.execute("CREATE TRIGGER IF NOT EXISTS transactions_fts_update "
+                       "AFTER UPDATE OF description, category ON transactions BEGIN "
+                       f"{_FTS_REMOVE} {_FTS_ADD} END")
+
+
+def _add_transaction_filter_indexes(connection):
+    # Indexes behind the transactions view's filters and sort orders (see TransactionFilter): amount for sorting and
+    # amount ranges, and (category, date), (category, amount), (account_id, amount) next to (account_id, date), so
+    # either equality filter pages in either sort order without sorting. (category, date) also serves every lookup
+    # the plain category index did, so that one goes.
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions(amount)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category_date ON transactions(category, date)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category_amount ON transactions(category, amount)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_transactions_account_amount ON transactions(account_id, amount)")
+    connection.execute("DROP INDEX IF EXISTS idx_transactions_category")
+    # Uncategorized rows had two spellings, NULL and '', and an OR over both can't be served in index order. Blank
+    # categories are stored as NULL only from now on (TransactionsRepository writes them through NULLIF), which the
+    # category indexes serve as an equality like any other category.
+    connection.execute("UPDATE transactions SET category = NULL WHERE category = ''")
+    # Against a database that has been analyzed, indexes without statistics look deceptively selective to the
+    # planner, which would then pick (category, amount) for pages sorted by date
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        for index in ('amount', 'category_date', 'category_amount', 'account_amount'):
+            connection.execute(f"ANALYZE idx_transactions_{index}")
+
+
+MIGRATIONS = [
+    _add_transaction_fingerprint,
+    _add_transaction_indexes,
+    _add_categorization_state,
+    _normalize_transaction_dates,
+    _add_monthly_summary,
+    _add_transaction_search,
+    _add_transaction_filter_indexes,
+]
+
+
+def schema_version(connection):
+    """Return the schema version stored in the database."""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection):
+    """
+    Apply every pending migration, each one in its own transaction.
+
+    Args:
+        connection (sqlite3.Connection): The database connection to upgrade.
+
+    Returns:
+        int: The schema version after migrating.
+    """
+    version = schema_version(connection)
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        connection.execute("BEGIN")
+        try:
+            migration(connection)
+            connection.execute(f"PRAGMA user_version = {number}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    return schema_version(connection)
@@ -0,0 +1,129 @@
+"""Streaming reader for OFX/QFX statement files.
+
+Walks the tag stream of both SGML (OFX 1.x) and XML (OFX 2.x) files incrementally, yielding one transaction dict
+per <STMTTRN> block without building a document tree, so memory stays flat regardless of file size. Text, dates
+and amounts are read the way ofxparse reads them (see importer.parse_ofx), so a statement gives the same rows, and
+the same import fingerprints, whichever parser reads it.
+"""
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from html import unescape
+
+# Number of characters read from the file per chunk
+READ_CHUNK_SIZE = 64 * 1024
+
+# The UTC offset in hours ending a date-time, and its fractional seconds
+_DATE_OFFSET = re.compile(r"\[([-+]?\d+\.?\d*):\w*\]$")
+_DATE_FRACTION = re.compile(r"[0-9]*\.([0-9]{0,5})")
+# The thousands separators of 1.025,53 and 1,025.53
+_DOT_BEFORE_COMMA = re.compile(r".*\..*,")
+_COMMA_BEFORE_DOT = re.compile(r".*,.*\.")
+
+
+def _iter_tags(file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield (tag, text) pairs from an OFX file, reading it in fixed-size chunks.
+
+    Args:
+        file: A text file object positioned at the start of the document.
+        chunk_size (int): The number of characters to read per chunk.
+
+    Yields:
+        tuple: The upper-cased tag name (closing tags keep their leading "/") and the stripped text that follows it,
+        with character references such as &amp; resolved.
+    """
+    buffer = ''
+    while True:
+        chunk = file.read(chunk_size)
+        buffer += chunk
+        start = buffer.find('<')
+        while start != -1:
+            end = buffer.find('>', start)
+            next_start = buffer.find('<', end) if end != -1 else -1
+            if next_start == -1:
+                if chunk:
+                    break  # Wait for the rest of the tag and its text
+                if end == -1:
+                    return
+                next_start = len(buffer)
+            tag = buffer[start + 1:end].strip()
+            if tag and tag[0] not in '?!':
+                yield tag.upper(), unescape(buffer[end + 1:next_start].strip())
+            start = next_start if next_start < len(buffer) else -1
+        if not chunk:
+            return
+        buffer = buffer[start:] if start != -1 else ''
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(posted):
+    """
+    Convert an OFX date-time, like 20240105220000.000[-5:EST], into its UTC date as YYYY-MM-DD.
+
+    The bracketed offset (in hours) and the fractional seconds are optional, as is everything after the date.
+    Cached, since the transactions of a statement share a few distinct posting times.
+    """
+    offset = _DATE_OFFSET.search(posted)
+    fraction = _DATE_FRACTION.match(posted)
+    try:
+        posted_at = datetime(int(posted[0:4]), int(posted[4:6]), int(posted[6:8]), int(posted[8:10]),
+                             int(posted[10:12]), int(posted[12:14]))
+    except ValueError:
+        posted_at = datetime(int(posted[0:4]), int(posted[4:6]), int(posted[6:8]))
+    if offset:
+        posted_at -= timedelta(hours=float(offset.group(1)))
+    if fraction:
+        posted_at += timedelta(seconds=float('0.' + fraction.group(1)))
+    return posted_at.date().isoformat()
+
+
+def _parse_amount(text):
+    """Convert an OFX amount into a float, accepting 1,025.53, 1.025,53, 1025,53 and 1 025,53 alike."""
+    if ',' in text:
+        if _DOT_BEFORE_COMMA.match(text):
+            text = text.replace('.', '')
+        if _COMMA_BEFORE_DOT.match(text):
+            text = text.replace(',', '')
+        if '.' not in text:
+            text = text.replace(',', '.')
+    return float(text.replace(' ', '').replace('+', ''))
+
+
+def _to_transaction(account_id, fields):
+    """Convert the raw fields of one <STMTTRN> block into a transaction dict."""
+    return {
+        'account_id': account_id,
+        'date': _parse_date(fields.get('DTPOSTED', '')),
+        'amount': _parse_amount(fields.get('TRNAMT', '0')),
+        'description': fields.get('MEMO') or fields.get('NAME', ''),
+        'category': None,
+        'fitid': fields.get('FITID'),
+    }
+
+
+def iter_ofx_transactions(file_path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Stream the transactions of an OFX/QFX file.
+
+    Args:
+        file_path (str): The path of the .ofx or .qfx file.
+        chunk_size (int): The number of characters to read per chunk.
+
+    Yields:
+        dict: A transaction with account_id, date, amount, description, category and fitid keys, in file order.
+    """
+    account_id = None
+    fields = None
+    with open(file_path, encoding='utf-8', errors='replace') as file:
+        for tag, text in _iter_tags(file, chunk_size):
+            if fields is not None:
+                if tag == '/STMTTRN':
+                    yield _to_transaction(account_id, fields)
+                    fields = None
+                elif not tag.startswith('/') and text:
+                    fields.setdefault(tag, text)
+            elif tag == 'STMTTRN':
+                fields = {}
+            elif tag == 'ACCTID':
+                account_id = text
@@ -0,0 +1,172 @@
+"""Opt-in SQL instrumentation for Database.execute_query and Database.execute_many.
+
+While a QueryProfiler is installed (see Database.enable_profiling) every statement is timed, including the time
+spent fetching its rows, and counted per distinct SQL text. The first time a query runs, its EXPLAIN QUERY PLAN is
+captured and the statement is flagged when the plan scans a whole table instead of searching an index.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+# Latency samples kept per statement for the percentiles, the most recent ones win
+MAX_SAMPLES = 10000
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] if ordered else 0.0
+
+
+class _StatementStats:
+    def __init__(self, query, plan):
+        self.query = query
+        self.plan = plan
+        # A SCAN step visits every row of a table (through an index or not), a SEARCH step only the matching ones.
+        # Scans of subqueries and constant rows are steps over results already in memory, not tables.
+        self.full_scan = any(step.startswith('SCAN ') and not step.startswith(('SCAN (', 'SCAN CONSTANT'))
+                             for step in plan)
+        self.count = 0
+        self.total = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+
+class ProfiledCursor:
+    """Wraps a cursor to add the time spent fetching rows, and the number of rows, to its statement's stats."""
+
+    def __init__(self, cursor, profiler, stats, seconds):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._stats = stats
+        # Record the execution right away, fetches add their time and rows to it as they happen. Statements without
+        # a result (writes) count the rows they changed instead.
+        rows = max(cursor.rowcount, 0) if cursor.description is None else 0
+        profiler._record(stats, seconds, rows, new_execution=True)
+
+    def _fetched(self, seconds, rows):
+        self._profiler._record(self._stats, seconds, rows)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(time.perf_counter() - start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._fetched(time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(time.perf_counter() - start, len(rows))
+        return rows
+
+    def __iter__(self):
+        while True:
+            start = time.perf_counter()
+            row = self._cursor.fetchone()
+            self._fetched(time.perf_counter() - start, row is not None)
+            if row is None:
+                return
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class QueryProfiler:
+    """Collects per-statement counts, latencies, row counts and query plans.
+
+    One profiler can be shared by every connection of the process; recording is thread-safe.
+    """
+
+    def __init__(self, explain=True):
+        self.explain = explain
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def _query_plan(self, connection, query, parameters):
+        if not self.explain:
+            return []
+        try:
+            return [row[3] for row in connection.execute("EXPLAIN QUERY PLAN " + query, parameters)]
+        except Exception:
+            return []  # Some statements (PRAGMA, BEGIN) have no plan
+
+    def _statement(self, connection, query, parameters):
+        stats = self._statements.get(query)
+        if stats is None:
+            # Explaining outside the lock is fine, at worst two threads explain the same query once
+            plan = self._query_plan(connection, query, parameters) if parameters is not None else []
+            with self._lock:
+                stats = self._statements.setdefault(query, _StatementStats(query, plan))
+        return stats
+
+    def _record(self, stats, seconds, rows, new_execution=False):
+        with self._lock:
+            if new_execution:
+                stats.count += 1
+                stats.samples.append(seconds)
+            elif stats.samples:
+                # Fetch time joins the statement's latest sample, which is this execution's unless another thread
+                # ran the same statement in between
+                stats.samples[-1] += seconds
+            stats.total += seconds
+            stats.rows += rows
+
+    def execute(self, connection, cursor, query, parameters=()):
+        """Run a statement on a cursor and return a cursor that keeps recording while its rows are fetched."""
+        stats = self._statement(connection, query, parameters)
+        start = time.perf_counter()
+        cursor.execute(query, parameters)
+        return ProfiledCursor(cursor, self, stats, time.perf_counter() - start)
+
+    def execute_many(self, connection, cursor, query, seq_of_parameters):
+        """Run a statement once per parameter set. Batched writes are timed as a whole and never explained."""
+        stats = self._statement(connection, query, None)
+        start = time.perf_counter()
+        cursor.executemany(query, seq_of_parameters)
+        seconds = time.perf_counter() - start
+        self._record(stats, seconds, max(cursor.rowcount, 0), new_execution=True)
+        return cursor
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._statements.clear()
+
+    def report(self):
+        """
+        Summarize every statement recorded so far.
+
+        Returns:
+            list: One dict per statement, slowest total first, with the query, count, total_ms, mean_ms, p50_ms,
+            p95_ms, p99_ms, max_ms, rows (returned or changed), full_scan and plan keys.
+        """
+        with self._lock:
+            statements = [(stats, list(stats.samples)) for stats in self._statements.values()]
+        report = []
+        for stats, samples in sorted(statements, key=lambda item: item[0].total, reverse=True):
+            report.append({
+                'query': stats.query,
+                'count': stats.count,
+                'total_ms': stats.total * 1000,
+                'mean_ms': stats.total * 1000 / stats.count if stats.count else 0.0,
+                'p50_ms': _percentile(samples, 50) * 1000,
+                'p95_ms': _percentile(samples, 95) * 1000,
+                'p99_ms': _percentile(samples, 99) * 1000,
+                'max_ms': max(samples, default=0.0) * 1000,
+                'rows': stats.rows,
+                'full_scan': stats.full_scan,
+                'plan': stats.plan,
+            })
+        return report
+
+    def dump(self, file_path):
+        """Write the report to a JSON file."""
+        with open(file_path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
@@ -0,0 +1,102 @@
+"""SQL-side aggregations for the Dashboard and Budget tabs.
+
+Every report is a GROUP BY query that returns a handful of already-rounded rows, so the UI never pulls raw
+transactions into Python. Transaction reports read the monthly_category_totals summary table, which triggers keep up
+to date on every insert, update and delete, so they scan a few hundred pre-aggregated rows rather than the whole
+transactions table. Months are 'YYYY-MM' strings taken from the ISO transaction dates.
+
+The Frequency column of Income and Expenses already stores how many times per month an entry occurs (see
+convert_frequency in the add dialogs: Weekly is 4, Bi-Monthly 2, Monthly 1 and Yearly 1/12), so the monthly
+amount of an entry is simply Amount * Frequency.
+"""
+
+
+class Reports:
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _month_range(start_month, end_month):
+        # Bounds on the month column, a range scan on the summary table's primary key
+        conditions = []
+        parameters = []
+        if start_month:
+            conditions.append("month >= ?")
+            parameters.append(start_month)
+        if end_month:
+            conditions.append("month <= ?")
+            parameters.append(end_month)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+    def monthly_category_totals(self, start_month=None, end_month=None):
+        """
+        Total the transactions of every month by category.
+
+        Args:
+            start_month (str): The first month to include ('YYYY-MM'), or None for no lower bound.
+            end_month (str): The last month to include ('YYYY-MM'), or None for no upper bound.
+
+        Returns:
+            list: (month, category, total, count) tuples ordered by month then category. Transactions without a
+            category are grouped under 'Uncategorized'.
+        """
+        where, parameters = self._month_range(start_month, end_month)
+        query = "SELECT month, category, ROUND(total, 2), count FROM monthly_category_totals" + where + \
+                " ORDER BY month, category"
+        cursor = self.db.execute_query(query, parameters)
+        return cursor.fetchall()
+
+    def monthly_cash_flow(self, start_month=None, end_month=None):
+        """
+        Split every month into money in and money out, with a running balance.
+
+        Args:
+            start_month (str): The first month to include ('YYYY-MM'), or None for no lower bound.
+            end_month (str): The last month to include ('YYYY-MM'), or None for no upper bound.
+
+        Returns:
+            list: (month, income, expenses, net, balance) tuples ordered by month. Expenses are positive, and the
+            balance is the running total of net over the returned months.
+        """
+        where, parameters = self._month_range(start_month, end_month)
+        query = "SELECT month, ROUND(income, 2), ROUND(expenses, 2), ROUND(income - expenses, 2), " \
+                "ROUND(SUM(income - expenses) OVER (ORDER BY month), 2) FROM (" \
+                "SELECT month, SUM(income) AS income, SUM(expenses) AS expenses " \
+                "FROM monthly_category_totals" + where + " GROUP BY month) ORDER BY month"
+        cursor = self.db.execute_query(query, parameters)
+        return cursor.fetchall()
+
+    def monthly_budget(self):
+        """
+        Normalize the recurring income, expenses and loan payments to monthly amounts.
+
+        Returns:
+            dict: monthly_income, monthly_expenses, monthly_loan_payments and monthly_surplus totals.
+        """
+        query = "SELECT " \
+                "(SELECT ROUND(COALESCE(SUM(Amount * Frequency), 0), 2) FROM Income), " \
+                "(SELECT ROUND(COALESCE(SUM(Amount * Frequency), 0), 2) FROM Expenses), " \
+                "(SELECT ROUND(COALESCE(SUM(Monthly_Payment), 0), 2) FROM Loans)"
+        income, expenses, loan_payments = self.db.execute_query(query).fetchone()
+        return {
+            'monthly_income': income,
+            'monthly_expenses': expenses,
+            'monthly_loan_payments': loan_payments,
+            'monthly_surplus': round(income - expenses - loan_payments, 2),
+        }
+
+    def monthly_budget_lines(self):
+        """
+        List every recurring entry with its monthly amount.
+
+        Returns:
+            list: (kind, name, monthly_amount) tuples, kind being 'Income', 'Expense' or 'Loan', largest amounts
+            first within each kind.
+        """
+        query = "SELECT kind, name, amount FROM (" \
+                "SELECT 'Income' AS kind, Name AS name, ROUND(Amount * Frequency, 2) AS amount FROM Income " \
+                "UNION ALL SELECT 'Expense', Name, ROUND(Amount * Frequency, 2) FROM Expenses " \
+                "UNION ALL SELECT 'Loan', Name, ROUND(Monthly_Payment, 2) FROM Loans) " \
+                "ORDER BY CASE kind WHEN 'Income' THEN 0 WHEN 'Expense' THEN 1 ELSE 2 END, amount DESC"
+        cursor = self.db.execute_query(query)
+        return cursor.fetchall()
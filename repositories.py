@@ -1,5 +1,68 @@
 # repositories.py
-from database import Database
+import re
+from itertools import islice
+from database import Database, transaction_fingerprint
+
+# Runs of letters and digits, the words the search index's unicode61 tokenizer splits text into
+_SEARCH_TERM = re.compile(r"[^\W_]+")
+
+
+def search_terms(text):
+    """Split search box text into lowercase words, ignoring punctuation."""
+    return [term.lower() for term in _SEARCH_TERM.findall(text or '')]
+
+
+class TransactionFilter:
+    """
+    Which transactions the transactions view shows, and in which order.
+
+    Criteria left as None aren't applied. TransactionsRepository translates the filter into a WHERE clause the
+    transaction indexes can serve, and pages through the matches with keyset pagination on (sort column, id), so
+    even sorting a million rows by amount only ever reads one page.
+    """
+
+    # Sort keys mapped to their column. Each one has an index on its own and one behind either equality filter
+    # (account_id, category), so those pages are read in index order instead of being sorted.
+    SORT_COLUMNS = {'date': 'date', 'amount': 'amount'}
+
+    def __init__(self, start_date=None, end_date=None, account_id=None, min_amount=None, max_amount=None,
+                 category=None, uncategorized=False, sort='date', descending=True):
+        """
+        Args:
+            start_date (str): The first date to include, as YYYY-MM-DD.
+            end_date (str): The last date to include, as YYYY-MM-DD.
+            account_id (str): Only include this account's transactions.
+            min_amount (float): The smallest amount to include.
+            max_amount (float): The largest amount to include.
+            category (str): Only include transactions in this category.
+            uncategorized (bool): Only include transactions without a category. Overrides category.
+            sort (str): The sort key, one of SORT_COLUMNS.
+            descending (bool): Sort largest (newest) first.
+        """
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Transactions can't be sorted by {sort!r}")
+        self.start_date = start_date
+        self.end_date = end_date
+        self.account_id = account_id
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.category = category or None
+        self.uncategorized = uncategorized
+        self.sort = sort
+        self.descending = descending
+
+    def replace(self, **changes):
+        """Return a copy of the filter with some of its fields changed."""
+        return TransactionFilter(**dict(vars(self), **changes))
+
+    def criteria_count(self):
+        """Return how many filter criteria are applied, not counting the sort order."""
+        criteria = [self.start_date, self.end_date, self.account_id, self.min_amount, self.max_amount,
+                    None if self.uncategorized else self.category]
+        return sum(value is not None for value in criteria) + bool(self.uncategorized)
+
+    def __eq__(self, other):
+        return isinstance(other, TransactionFilter) and vars(self) == vars(other)
 
 
 # Base repository class that provides a template for other repository classes
@@ -22,9 +85,21 @@ class BaseRepository:
     def delete(self, id):
         raise NotImplementedError
 
+    def create_many(self, records):
+        raise NotImplementedError
+
+    def update_many(self, records):
+        raise NotImplementedError
+
+    def delete_many(self, ids):
+        raise NotImplementedError
+
 
 # Repository class for handling transactions table CRUD operations
 class TransactionsRepository(BaseRepository):
+    # Rows import_many writes per statement batch
+    IMPORT_BATCH_SIZE = 10000
+
     def all(self):
         """Retrieve all rows from the transactions table.
         
@@ -35,10 +110,175 @@ class TransactionsRepository(BaseRepository):
         cursor = self.db.execute_query(query)
         return cursor.fetchall()
 
-    def create(self, income_id, expense_id, amount, date):
+    def page(self, after=None, limit=500, transaction_filter=None):
+        """
+        Retrieve one page of transactions using keyset pagination on (sort column, id).
+
+        Unlike LIMIT/OFFSET, each page is an index range scan starting right after the previous page, so fetching
+        a page costs the same no matter how deep into the history it is.
+
+        Args:
+            after (tuple): The (sort column value, id) of the last row of the previous page, or None for the first
+                page.
+            limit (int): The maximum number of rows to return.
+            transaction_filter (TransactionFilter): The rows to include and their order, defaults to every
+                transaction, newest first.
+
+        Returns:
+            list: Tuples of (id, account_id, date, amount, description, category).
+        """
+        transaction_filter = transaction_filter or TransactionFilter()
+        column = TransactionFilter.SORT_COLUMNS[transaction_filter.sort]
+        conditions, parameters = self._filter_conditions(transaction_filter)
+        direction, comparison = ('DESC', '<') if transaction_filter.descending else ('ASC', '>')
+        if after is not None:
+            conditions.append(f"({column}, id) {comparison} (?, ?)")
+            parameters.extend(after)
+
+        query = "SELECT id, account_id, date, amount, description, category FROM transactions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {column} {direction}, id {direction} LIMIT ?"
+        cursor = self.db.execute_query(query, parameters + [limit])
+        return cursor.fetchall()
+
+    @staticmethod
+    def _filter_conditions(transaction_filter, prefix=''):
+        # The WHERE terms of a filter, each one servable by an index. Uncategorized rows are stored as NULL only (see
+        # migrations._add_transaction_filter_indexes), so that term is an equality the category indexes serve.
+        conditions = []
+        parameters = []
+        for value, condition in [(transaction_filter.start_date, "date >= ?"),
+                                 (transaction_filter.end_date, "date <= ?"),
+                                 (transaction_filter.account_id, "account_id = ?"),
+                                 (transaction_filter.min_amount, "amount >= ?"),
+                                 (transaction_filter.max_amount, "amount <= ?")]:
+            if value is not None:
+                conditions.append(prefix + condition)
+                parameters.append(value)
+        if transaction_filter.uncategorized:
+            conditions.append(f"{prefix}category IS NULL")
+        elif transaction_filter.category is not None:
+            conditions.append(f"{prefix}category = ?")
+            parameters.append(transaction_filter.category)
+        return conditions, parameters
+
+    def accounts(self):
+        """Return the distinct account IDs, in order."""
+        cursor = self.db.execute_query("SELECT DISTINCT account_id FROM transactions ORDER BY account_id")
+        return [row[0] for row in cursor.fetchall()]
+
+    def _has_search_index(self):
+        # The search migration leaves the index out when SQLite was built without FTS5
+        return self.db.execute_query("SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'").fetchone() \
+            is not None
+
+    def search(self, text, limit=500, offset=0, transaction_filter=None):
+        """
+        Full-text search over transaction descriptions and categories, best matches first.
+
+        Every word of the text has to match, and each one matches as a prefix, so "amaz mark" finds
+        "AMAZON MARKETPLACE". Matches are ranked with BM25, description hits above category hits, and ties are
+        broken newest first. Without the FTS5 index (SQLite built without it) this falls back to an unranked LIKE
+        scan, newest first.
+
+        Args:
+            text (str): The search text. Punctuation is ignored.
+            limit (int): The maximum number of rows to return.
+            offset (int): The number of matches to skip, for the next page of results.
+            transaction_filter (TransactionFilter): Only return matches that pass the filter. Its sort order is
+                ignored, matches are always ranked.
+
+        Returns:
+            list: Tuples of (id, account_id, date, amount, description, category), empty when the text has no
+            words.
+        """
+        terms = search_terms(text)
+        if not terms:
+            return []
+        conditions, parameters = self._filter_conditions(transaction_filter or TransactionFilter(), 't.')
+        if self._has_search_index():
+            # Every term as a quoted prefix query. Terms are letters and digits only, so they need no escaping.
+            conditions.insert(0, "transactions_fts MATCH ?")
+            parameters.insert(0, ' '.join(f'"{term}"*' for term in terms))
+            query = "SELECT t.id, t.account_id, t.date, t.amount, t.description, t.category " \
+                    "FROM transactions_fts JOIN transactions AS t ON t.id = transactions_fts.rowid " \
+                    "WHERE " + " AND ".join(conditions) + \
+                    " ORDER BY transactions_fts.rank, t.date DESC, t.id DESC LIMIT ? OFFSET ?"
+        else:
+            conditions.extend(["(t.description LIKE ? OR t.category LIKE ?)"] * len(terms))
+            parameters.extend(pattern for term in terms for pattern in (f"%{term}%",) * 2)
+            query = "SELECT t.id, t.account_id, t.date, t.amount, t.description, t.category FROM transactions AS t " \
+                    "WHERE " + " AND ".join(conditions) + " ORDER BY t.date DESC, t.id DESC LIMIT ? OFFSET ?"
+        return self.db.execute_query(query, parameters + [limit, offset]).fetchall()
+
+    def create(self, account_id, date, amount, description, category=None):
         """Create a new transaction."""
-        query = "INSERT INTO transactions (income_id, expense_id, amount, date) VALUES (?, ?, ?, ?)"
-        self.db.execute_query(query, (income_id, expense_id, amount, date))
+        query = "INSERT INTO transactions (account_id, date, amount, description, category, fingerprint) " \
+                "VALUES (?, ?, ?, ?, NULLIF(?, ''), ?)"
+        self.db.execute_query(query, (account_id, date, amount, description, category,
+                                      transaction_fingerprint(account_id, date, amount, description)))
+
+    def create_many(self, records):
+        """
+        Create several transactions in a single database transaction.
+
+        Args:
+            records (iterable): (account_id, date, amount, description, category) tuples.
+        """
+        query = "INSERT INTO transactions (account_id, date, amount, description, category, fingerprint) " \
+                "VALUES (?, ?, ?, ?, NULLIF(?, ''), ?)"
+        self.db.execute_many(query, ((account_id, date, amount, description, category,
+                                      transaction_fingerprint(account_id, date, amount, description))
+                                     for account_id, date, amount, description, category in records))
+
+    def import_many(self, transactions):
+        """
+        Insert parsed statement transactions in a single database transaction, skipping duplicates.
+
+        A transaction is a duplicate when its account already holds its OFX FITID, or when a stored row has the same
+        content fingerprint (account ID, date, amount and description) and one of the two has no FITID, like a row
+        entered by hand. Such a stored row takes over the incoming FITID, so a statement with two identical
+        transactions under different FITIDs still adds the second one. Rows are written in batches of
+        IMPORT_BATCH_SIZE, so the input can be any iterable, including a generator, without being held in memory
+        at once. The search index is updated once for the whole import instead of by the per-row trigger.
+
+        Args:
+            transactions (iterable): Dicts with account_id, date, amount, description and category keys, plus an
+                optional fitid key.
+
+        Returns:
+            tuple: The number of inserted rows and the number of skipped duplicates.
+        """
+        rows = ((transaction['account_id'], transaction['date'], transaction['amount'], transaction['description'],
+                 transaction['category'], transaction.get('fitid') or None,
+                 transaction_fingerprint(transaction['account_id'], transaction['date'], transaction['amount'],
+                                         transaction['description']))
+                for transaction in transactions)
+        claim = "UPDATE OR IGNORE transactions SET fitid = ? WHERE id = " \
+                "(SELECT id FROM transactions WHERE fingerprint = ? AND fitid IS NULL LIMIT 1)"
+        query = "INSERT OR IGNORE INTO transactions " \
+                "(account_id, date, amount, description, category, fitid, fingerprint) " \
+                "SELECT ?1, ?2, ?3, ?4, NULLIF(?5, ''), ?6, ?7 WHERE NOT EXISTS " \
+                "(SELECT 1 FROM transactions WHERE fingerprint = ?7 AND (fitid IS NULL OR ?6 IS NULL))"
+        total = inserted = 0
+        with self.db.transaction():
+            deferred = self._has_search_index()
+            if deferred:
+                # IDs only ever grow (AUTOINCREMENT), so the inserted rows are the ones above the current maximum
+                last_id = self.max_id()
+                self.db.execute_query("UPDATE search_index_state SET deferred = 1")
+            for batch in iter(lambda: list(islice(rows, self.IMPORT_BATCH_SIZE)), []):
+                total += len(batch)
+                # Claim first: the claiming row is then skipped through its FITID, and a claimed row no longer
+                # matches the batch's other rows with the same content
+                self.db.execute_many(claim, [(row[5], row[6]) for row in batch if row[5] is not None])
+                inserted += self.db.execute_many(query, batch).rowcount
+            if deferred:
+                self.db.execute_query("INSERT INTO transactions_fts (rowid, description, category) "
+                                      "SELECT id, description, category FROM transactions WHERE id > ?", (last_id,))
+                self.db.execute_query("UPDATE search_index_state SET deferred = 0")
+        return inserted, total - inserted
 
     def read(self, id):
         """
@@ -54,21 +294,80 @@ class TransactionsRepository(BaseRepository):
         cursor = self.db.execute_query(query, (id,))
         return cursor.fetchone()
 
-    def update(self, id, income_id, expense_id, amount, date):
+    def update(self, id, account_id, date, amount, description, category):
         """Update a transaction."""
-        query = "UPDATE transactions SET income_id = ?, expense_id = ?, amount = ?, date = ? WHERE id = ?"
-        self.db.execute_query(query, (income_id, expense_id, amount, date, id))
+        query = "UPDATE transactions SET account_id = ?, date = ?, amount = ?, description = ?, " \
+                "category = NULLIF(?, '') WHERE id = ?"
+        self.db.execute_query(query, (account_id, date, amount, description, category, id))
+
+    def update_many(self, records):
+        """
+        Update several transactions in a single database transaction.
+
+        Args:
+            records (iterable): (id, account_id, date, amount, description, category) tuples.
+        """
+        query = "UPDATE transactions SET account_id = ?, date = ?, amount = ?, description = ?, " \
+                "category = NULLIF(?, '') WHERE id = ?"
+        self.db.execute_many(query, (tuple(record[1:]) + (record[0],) for record in records))
+
+    def max_id(self):
+        """Return the highest transaction ID, or 0 when the table is empty."""
+        cursor = self.db.execute_query("SELECT COALESCE(MAX(id), 0) FROM transactions")
+        return cursor.fetchone()[0]
+
+    def uncategorized(self, after_id=0, up_to_id=None, like_patterns=None):
+        """
+        Iterate over the transactions that have no category yet.
+
+        Args:
+            after_id (int): Only include transactions with a greater ID.
+            up_to_id (int): Only include transactions with this ID or lower, or None for no upper bound.
+            like_patterns (list): When given, only include transactions whose normalized description (see
+                database.normalize_description) matches at least one of these LIKE patterns, using backslash as the
+                escape character.
+
+        Returns:
+            sqlite3.Cursor: Yields (id, description) tuples lazily; exhaust it before writing to the table.
+        """
+        query = "SELECT id, description FROM transactions WHERE category IS NULL AND id > ?"
+        parameters = [after_id]
+        if up_to_id is not None:
+            query += " AND id <= ?"
+            parameters.append(up_to_id)
+        if like_patterns is not None:
+            if not like_patterns:
+                return iter(())
+            like = "normalize_description(description) LIKE ? ESCAPE '\\'"
+            query += " AND (" + " OR ".join([like] * len(like_patterns)) + ")"
+            parameters.extend(like_patterns)
+        return self.db.execute_query(query, parameters)
 
     def update_category(self, id, category):
         """Update the category of a transaction."""
-        query = "UPDATE transactions SET category = ? WHERE id = ?"
+        query = "UPDATE transactions SET category = NULLIF(?, '') WHERE id = ?"
         self.db.execute_query(query, (category, id))
 
+    def update_category_many(self, changes):
+        """
+        Update the category of several transactions in a single database transaction.
+
+        Args:
+            changes (iterable): (id, category) pairs.
+        """
+        query = "UPDATE transactions SET category = NULLIF(?, '') WHERE id = ?"
+        self.db.execute_many(query, ((category, id) for id, category in changes))
+
     def delete(self, id):
         """Delete a transaction."""
         query = "DELETE FROM transactions WHERE id = ?"
         self.db.execute_query(query, (id,))
 
+    def delete_many(self, ids):
+        """Delete several transactions in a single database transaction."""
+        query = "DELETE FROM transactions WHERE id = ?"
+        self.db.execute_many(query, ((id,) for id in ids))
+
 
 class IncomeRepository(BaseRepository):
     def all(self):
@@ -82,6 +381,16 @@ class IncomeRepository(BaseRepository):
         query = "INSERT INTO income (name, amount, frequency) VALUES (?, ?, ?)"
         self.db.execute_query(query, (name, amount, frequency))
 
+    def create_many(self, records):
+        """
+        Create several income sources in a single database transaction.
+
+        Args:
+            records (iterable): (name, amount, frequency) tuples.
+        """
+        query = "INSERT INTO income (name, amount, frequency) VALUES (?, ?, ?)"
+        self.db.execute_many(query, records)
+
     def read(self, id):
         """Retrieve a specific income source by its ID."""
         query = "SELECT * FROM income WHERE id = ?"
@@ -93,11 +402,26 @@ class IncomeRepository(BaseRepository):
         query = "UPDATE income SET name = ?, amount = ?, frequency = ? WHERE id = ?"
         self.db.execute_query(query, (name, amount, frequency, id))
 
+    def update_many(self, records):
+        """
+        Update several income sources in a single database transaction.
+
+        Args:
+            records (iterable): (id, name, amount, frequency) tuples.
+        """
+        query = "UPDATE income SET name = ?, amount = ?, frequency = ? WHERE id = ?"
+        self.db.execute_many(query, (tuple(record[1:]) + (record[0],) for record in records))
+
     def delete(self, id):
         """Delete an income source."""
         query = "DELETE FROM income WHERE id = ?"
         self.db.execute_query(query, (id,))
 
+    def delete_many(self, ids):
+        """Delete several income sources in a single database transaction."""
+        query = "DELETE FROM income WHERE id = ?"
+        self.db.execute_many(query, ((id,) for id in ids))
+
 
 class ExpensesRepository(BaseRepository):
     def all(self):
@@ -111,6 +435,16 @@ class ExpensesRepository(BaseRepository):
         query = "INSERT INTO Expenses (Name, Amount, Frequency) VALUES (?, ?, ?)"
         self.db.execute_query(query, (name, amount, frequency))
 
+    def create_many(self, records):
+        """
+        Create several expenses in a single database transaction.
+
+        Args:
+            records (iterable): (name, amount, frequency) tuples.
+        """
+        query = "INSERT INTO Expenses (Name, Amount, Frequency) VALUES (?, ?, ?)"
+        self.db.execute_many(query, records)
+
     def read(self, id):
         """Retrieve a specific expense by its ID."""
         query = "SELECT * FROM Expenses WHERE ID = ?"
@@ -122,11 +456,26 @@ class ExpensesRepository(BaseRepository):
         query = "UPDATE Expenses SET Name = ?, Amount = ?, Frequency = ? WHERE ID = ?"
         self.db.execute_query(query, (name, amount, frequency, id))
 
+    def update_many(self, records):
+        """
+        Update several expenses in a single database transaction.
+
+        Args:
+            records (iterable): (id, name, amount, frequency) tuples.
+        """
+        query = "UPDATE Expenses SET Name = ?, Amount = ?, Frequency = ? WHERE ID = ?"
+        self.db.execute_many(query, (tuple(record[1:]) + (record[0],) for record in records))
+
     def delete(self, id):
         """Delete an expense."""
         query = "DELETE FROM Expenses WHERE ID = ?"
         self.db.execute_query(query, (id,))
 
+    def delete_many(self, ids):
+        """Delete several expenses in a single database transaction."""
+        query = "DELETE FROM Expenses WHERE ID = ?"
+        self.db.execute_many(query, ((id,) for id in ids))
+
 class LoansRepository(BaseRepository):
     def all(self):
         """Retrieve all rows from the loans table."""
@@ -139,6 +488,17 @@ class LoansRepository(BaseRepository):
         query = "INSERT INTO Loans (Name, Monthly_Payment, Remaining_Balance, Starting_Date, APR, Last_Payment, Next_Payment) VALUES (?, ?, ?, ?, ?, ?, ?)"
         self.db.execute_query(query, (name, monthly_payment, remaining_balance, starting_date, apr, last_payment, next_payment))
 
+    def create_many(self, records):
+        """
+        Create several loans in a single database transaction.
+
+        Args:
+            records (iterable): (name, monthly_payment, remaining_balance, starting_date, apr, last_payment,
+                next_payment) tuples.
+        """
+        query = "INSERT INTO Loans (Name, Monthly_Payment, Remaining_Balance, Starting_Date, APR, Last_Payment, Next_Payment) VALUES (?, ?, ?, ?, ?, ?, ?)"
+        self.db.execute_many(query, records)
+
     def read(self, id):
         """Retrieve a specific loan by its ID."""
         query = "SELECT * FROM Loans WHERE ID = ?"
@@ -150,11 +510,27 @@ class LoansRepository(BaseRepository):
         query = "UPDATE Loans SET Name = ?, Monthly_Payment = ?, Remaining_Balance = ?, Starting_Date = ?, APR = ?, Last_Payment = ?, Next_Payment = ? WHERE ID = ?"
         self.db.execute_query(query, (name, monthly_payment, remaining_balance, starting_date, apr, last_payment, next_payment, id))
 
+    def update_many(self, records):
+        """
+        Update several loans in a single database transaction.
+
+        Args:
+            records (iterable): (id, name, monthly_payment, remaining_balance, starting_date, apr, last_payment,
+                next_payment) tuples.
+        """
+        query = "UPDATE Loans SET Name = ?, Monthly_Payment = ?, Remaining_Balance = ?, Starting_Date = ?, APR = ?, Last_Payment = ?, Next_Payment = ? WHERE ID = ?"
+        self.db.execute_many(query, (tuple(record[1:]) + (record[0],) for record in records))
+
     def delete(self, id):
         """Delete a loan."""
         query = "DELETE FROM Loans WHERE ID = ?"
         self.db.execute_query(query, (id,))
 
+    def delete_many(self, ids):
+        """Delete several loans in a single database transaction."""
+        query = "DELETE FROM Loans WHERE ID = ?"
+        self.db.execute_many(query, ((id,) for id in ids))
+
 
 class AssetsRepository(BaseRepository):
     def all(self):
@@ -168,6 +544,16 @@ class AssetsRepository(BaseRepository):
         query = "INSERT INTO assets (name, value, acquisition_date) VALUES (?, ?, ?)"
         self.db.execute_query(query, (name, value, acquisition_date))
 
+    def create_many(self, records):
+        """
+        Create several assets in a single database transaction.
+
+        Args:
+            records (iterable): (name, value, acquisition_date) tuples.
+        """
+        query = "INSERT INTO assets (name, value, acquisition_date) VALUES (?, ?, ?)"
+        self.db.execute_many(query, records)
+
     def read(self, id):
         """Retrieve a specific asset by its ID."""
         query = "SELECT * FROM assets WHERE id = ?"
@@ -179,11 +565,26 @@ class AssetsRepository(BaseRepository):
         query = "UPDATE assets SET name = ?, value = ?, acquisition_date = ? WHERE id = ?"
         self.db.execute_query(query, (name, value, acquisition_date, id))
 
+    def update_many(self, records):
+        """
+        Update several assets in a single database transaction.
+
+        Args:
+            records (iterable): (id, name, value, acquisition_date) tuples.
+        """
+        query = "UPDATE assets SET name = ?, value = ?, acquisition_date = ? WHERE id = ?"
+        self.db.execute_many(query, (tuple(record[1:]) + (record[0],) for record in records))
+
     def delete(self, id):
         """Delete an asset."""
         query = "DELETE FROM assets WHERE id = ?"
         self.db.execute_query(query, (id,))
 
+    def delete_many(self, ids):
+        """Delete several assets in a single database transaction."""
+        query = "DELETE FROM assets WHERE id = ?"
+        self.db.execute_many(query, ((id,) for id in ids))
+
 
 class CategoriesRepository(BaseRepository):
     def all(self):
@@ -197,22 +598,98 @@ class CategoriesRepository(BaseRepository):
         query = "INSERT INTO Categories (Name, Description) VALUES (?, ?)"
         self.db.execute_query(query, (category, description))
 
+    def create_many(self, records):
+        """
+        Create several categories in a single database transaction.
+
+        Args:
+            records (iterable): (description, category) tuples.
+        """
+        query = "INSERT INTO Categories (Name, Description) VALUES (?, ?)"
+        self.db.execute_many(query, ((category, description) for description, category in records))
+
     def read(self, id):
         """Retrieve a specific category by its ID."""
         query = "SELECT * FROM Categories WHERE id = ?"
         cursor = self.db.execute_query(query, (id,))
         return cursor.fetchone()
 
+    def names(self):
+        """
+        Retrieve the distinct category names.
 
-def read_by_description(self, description):
-    """Retrieve a category by its description.
+        Returns:
+            list: The names, sorted case-insensitively.
+        """
+        query = "SELECT DISTINCT Name FROM Categories ORDER BY Name COLLATE NOCASE"
+        cursor = self.db.execute_query(query)
+        return [row[0] for row in cursor]
 
-    Args:
-        description (str): The description of the category to retrieve.
+    def change_stamp(self):
+        """
+        Return a value that changes whenever a category is added, edited or deleted.
 
-    Returns:
-        tuple: A tuple representing the category row, or None if the category is not found.
-    """
-    query = "SELECT * FROM categories WHERE description = ?"
-    cursor = self.db.execute_query(query, (description,))
-    return cursor.fetchone()
+        Returns:
+            int: The rules version, which every insert, edit and delete of a category increases.
+        """
+        return self.rules_version()
+
+    def rules(self):
+        """
+        Retrieve the categorization rules.
+
+        Returns:
+            list: (pattern, category) tuples, taken from the Description and Name columns.
+        """
+        query = "SELECT Description, Name FROM Categories WHERE Description IS NOT NULL"
+        cursor = self.db.execute_query(query)
+        return cursor.fetchall()
+
+    def rules_version(self):
+        """
+        Return the current rules version, the number of times a rule was added, edited or deleted.
+
+        It only ever increases, and every rule is stamped with the version its last change produced.
+        """
+        cursor = self.db.execute_query("SELECT rule_changes FROM categorization_state WHERE id = 1")
+        return cursor.fetchone()[0]
+
+    def rules_changed_since(self, version):
+        """
+        Retrieve the rules added or edited after a given rules version.
+
+        Returns:
+            list: (pattern, category) tuples.
+        """
+        query = "SELECT Description, Name FROM Categories WHERE Description IS NOT NULL AND Version > ?"
+        cursor = self.db.execute_query(query, (version,))
+        return cursor.fetchall()
+
+    def categorization_state(self):
+        """
+        Retrieve how far the last categorization run got.
+
+        Returns:
+            tuple: The highest transaction ID and the rules version the last run covered.
+        """
+        query = "SELECT last_transaction_id, rules_version FROM categorization_state WHERE id = 1"
+        cursor = self.db.execute_query(query)
+        return cursor.fetchone()
+
+    def save_categorization_state(self, last_transaction_id, rules_version):
+        """Record how far a categorization run got."""
+        query = "UPDATE categorization_state SET last_transaction_id = ?, rules_version = ? WHERE id = 1"
+        self.db.execute_query(query, (last_transaction_id, rules_version))
+
+    def read_by_description(self, description):
+        """Retrieve a category by its description.
+
+        Args:
+            description (str): The description of the category to retrieve.
+
+        Returns:
+            tuple: A tuple representing the category row, or None if the category is not found.
+        """
+        query = "SELECT * FROM Categories WHERE Description = ?"
+        cursor = self.db.execute_query(query, (description,))
+        return cursor.fetchone()
@@ -0,0 +1,35 @@
+import os
+import shutil
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import Database, DB_PATH  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+
+@pytest.fixture
+def empty_database(tmp_path):
+    """A copy of the shipped database with its rows removed and no migrations applied, at schema version 0."""
+    file_path = str(tmp_path / 'finance.db')
+    shutil.copyfile(os.path.join(ROOT, DB_PATH), file_path)
+    connection = sqlite3.connect(file_path)
+    connection.execute("PRAGMA user_version = 0")
+    connection.commit()
+    connection.close()
+    return file_path
+
+
+@pytest.fixture
+def db(empty_database):
+    """An open, fully migrated database without transactions or categories."""
+    database = Database.open(empty_database)
+    migrate(database.db_connection)
+    database.execute_query("DELETE FROM transactions")
+    database.execute_query("DELETE FROM Categories")
+    yield database
+    database.close()
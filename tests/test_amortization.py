@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import amortization
+
+# Balance, APR in percent, monthly payment: an amortizing loan, an interest-free one, one whose last payment is
+# partial, one already paid off and one whose payment never covers the interest
+BALANCE = np.array([10000.0, 1200.0, 5000.0, 0.0, 8000.0])
+APR = np.array([6.0, 0.0, 19.99, 5.0, 24.0])
+PAYMENT = np.array([193.33, 100.0, 250.0, 50.0, 150.0])
+
+
+def test_textbook_loan_is_paid_off_on_schedule():
+    # 10,000 at 6% over 5 years is 193.33 a month
+    assert amortization.months_to_payoff(BALANCE[:1], APR[:1], PAYMENT[:1])[0] == 60
+    assert amortization.total_interest(BALANCE[:1], APR[:1], PAYMENT[:1])[0] == pytest.approx(1599.68, abs=0.05)
+
+
+def test_closed_form_payoff_matches_the_schedule():
+    months = amortization.months_to_payoff(BALANCE, APR, PAYMENT)
+    interest = amortization.total_interest(BALANCE, APR, PAYMENT)
+    schedule = amortization.schedules(BALANCE, APR, PAYMENT, max_months=240)
+
+    assert list(months[[0, 1, 3]]) == [60, 12, 0]
+    assert 0 < schedule['payment'][2, int(months[2]) - 1] < PAYMENT[2]  # The partial last payment
+    assert np.isinf(months[4]) and np.isinf(interest[4])
+    paid_off = slice(0, 4)
+    assert (schedule['payment'][paid_off] > 0).sum(axis=1) == pytest.approx(months[paid_off])
+    assert schedule['interest'][paid_off].sum(axis=1) == pytest.approx(interest[paid_off], abs=1e-6)
+    assert schedule['payment'][paid_off].sum(axis=1) == pytest.approx(BALANCE[paid_off] + interest[paid_off],
+                                                                       abs=1e-6)
+    assert schedule['principal'][paid_off].sum(axis=1) == pytest.approx(BALANCE[paid_off], abs=1e-6)
+    assert schedule['balance'][paid_off, -1] == pytest.approx(0, abs=1e-6)
+
+    # Every month's closing balance is the closed-form balance after that many payments
+    k = np.arange(1, 61)
+    assert schedule['balance'][0, :59] == pytest.approx(amortization.balance_after(BALANCE[0], APR[0], PAYMENT[0],
+                                                                                   k[:59]))
+
+
+def test_simulation_without_extra_money_matches_the_closed_form():
+    loan = slice(0, 1)
+    simulated = amortization.simulate_payoff(BALANCE[loan], APR[loan], PAYMENT[loan])
+    assert simulated['months'] == 60
+    assert simulated['total_interest'] == pytest.approx(amortization.total_interest(BALANCE[loan], APR[loan],
+                                                                                    PAYMENT[loan])[0])
+
+
+def test_extra_payments_never_cost_more_interest():
+    paid_off = slice(0, 4)
+    strategies = amortization.compare_strategies(BALANCE[paid_off], APR[paid_off], PAYMENT[paid_off], extra=200.0)
+    minimum = strategies['minimum']
+    for name in ('avalanche', 'snowball'):
+        assert strategies[name]['months'] < minimum['months']
+        assert strategies[name]['total_interest'] < minimum['total_interest']
+    assert strategies['avalanche']['total_interest'] <= strategies['snowball']['total_interest']
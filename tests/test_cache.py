@@ -0,0 +1,24 @@
+from cache import CategoryCache
+from repositories import CategoriesRepository
+
+
+def test_category_cache_reloads_after_deleting_the_newest_category_and_adding_another(db):
+    categories_repo = CategoriesRepository(db)
+    categories_repo.create('GROCERY*', 'Groceries')
+    categories_repo.create('FUEL*', 'Fuel')
+    cache = CategoryCache(categories_repo)
+    assert cache.names() == ['Fuel', 'Groceries']
+
+    # Same number of categories as before, and the new one would get the deleted one's version under MAX(Version)
+    db.execute_query("DELETE FROM Categories WHERE Name = 'Fuel'")
+    categories_repo.create('*RENT*', 'Housing')
+    assert cache.names() == ['Groceries', 'Housing']
+
+
+def test_category_cache_keeps_names_while_categories_are_unchanged(db):
+    categories_repo = CategoriesRepository(db)
+    categories_repo.create('GROCERY*', 'Groceries')
+    cache = CategoryCache(categories_repo)
+    names = cache.names()
+    assert cache.names() is names
+    assert cache.generation == 1
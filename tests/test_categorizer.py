@@ -0,0 +1,45 @@
+from categorizer import CategoryMatcher, categorize_transactions
+from repositories import TransactionsRepository, CategoriesRepository
+
+
+def test_longest_overlapping_substring_rule_wins():
+    matcher = CategoryMatcher([('*AB*', 'Short'), ('*BCDEF*', 'Long')])
+    assert matcher.match('xabcdefx') == 'Long'
+    assert matcher.match('xabx') == 'Short'
+
+
+def test_rule_precedence():
+    matcher = CategoryMatcher([('*COFFEE*', 'Substring'), ('COFFEE*', 'Prefix'), ('Coffee Shop', 'Exact')])
+    assert matcher.match('  coffee   SHOP ') == 'Exact'
+    assert matcher.match('Coffee Shop 42') == 'Prefix'
+    assert matcher.match('Best Coffee') == 'Substring'
+    assert matcher.match('Tea') is None
+
+
+def test_incremental_run_finds_rows_for_new_rules_despite_whitespace_and_case(db):
+    transactions_repo = TransactionsRepository(db)
+    categories_repo = CategoriesRepository(db)
+    transactions_repo.create('1', '2024-01-01', -4.0, '  Straße   Bakery ')
+    transactions_repo.create('1', '2024-01-02', -3.0, 'Le Café Royal')
+    assert categorize_transactions(transactions_repo, categories_repo) == 0
+
+    # Rules added after the first run, matching only once whitespace is collapsed and non-ASCII case is folded
+    categories_repo.create('STRASSE BAKERY*', 'Bakery')
+    categories_repo.create('*CAFÉ*', 'Coffee')
+    assert categorize_transactions(transactions_repo, categories_repo) == 2
+    assert sorted(row[5] for row in transactions_repo.all()) == ['Bakery', 'Coffee']
+
+
+def test_rule_added_after_deleting_the_newest_rule_is_applied_incrementally(db):
+    transactions_repo = TransactionsRepository(db)
+    categories_repo = CategoriesRepository(db)
+    transactions_repo.create('1', '2024-01-01', -9.0, 'Grocery Mart')
+    categories_repo.create('Unrelated*', 'Other')
+    assert categorize_transactions(transactions_repo, categories_repo) == 0
+
+    # Delete the newest rule, then add one matching the transaction the last run left uncategorized
+    version = categories_repo.rules_version()
+    db.execute_query("DELETE FROM Categories WHERE Description = 'Unrelated*'")
+    categories_repo.create('GROCERY*', 'Groceries')
+    assert categories_repo.rules_version() == version + 2
+    assert categorize_transactions(transactions_repo, categories_repo) == 1
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from test_ofx_reader import STATEMENT, _sgml
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cli.py')
+
+
+def _import(database, statement, parser):
+    result = subprocess.run([sys.executable, CLI, '--db', database, 'import', '--no-categorize', '--parser', parser,
+                             statement], capture_output=True, text=True, check=True)
+    return result.stdout.splitlines()[0]
+
+
+def test_reimporting_with_the_other_parser_skips_every_transaction(empty_database, tmp_path):
+    pytest.importorskip('ofxparse')
+    statement = tmp_path / 'statement.ofx'
+    statement.write_text(_sgml(STATEMENT))
+
+    assert _import(empty_database, str(statement), 'stream') == "statement.ofx: 3 inserted, 0 skipped"
+    assert _import(empty_database, str(statement), 'ofxparse') == "statement.ofx: 0 inserted, 3 skipped"
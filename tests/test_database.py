@@ -0,0 +1,7 @@
+def test_statement_cache_counts_repeated_statements_as_hits(db):
+    before = db.statement_cache_stats()
+    for _ in range(3):
+        db.execute_query("SELECT COUNT(*) FROM transactions WHERE amount > ?", (0,))
+    stats = db.statement_cache_stats()
+    assert (stats['hits'] - before['hits'], stats['misses'] - before['misses']) == (2, 1)
+    assert 0.0 < stats['hit_rate'] < 1.0
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import forecast
+
+# Income and Expenses rows are (ID, Name, Amount, Frequency), Loans rows (ID, Name, Monthly_Payment,
+# Remaining_Balance, Starting_Date, APR, Last_Payment, Next_Payment)
+INCOME = [(1, 'Salary', 2000.0, 2), (2, 'Side job', 300.0, 1)]
+EXPENSES = [(1, 'Rent', 1500.0, 1), (2, 'Groceries', 100.0, 4)]
+LOANS = [(1, 'Car', 250.0, 1000.0, '2023-01-01', 0.0, '2024-01-01', '2024-02-01')]
+
+
+def test_deterministic_balance_stops_paying_loans_once_paid_off():
+    balance = forecast.forecast(1000.0, INCOME, EXPENSES, LOANS, years=1)['balance']
+    # 4,300 in and 1,900 out every month, plus the 250 loan payment for the first four months
+    assert balance == pytest.approx(1000.0 + np.cumsum([2150.0] * 4 + [2400.0] * 8))
+
+
+def test_percentile_bands_are_stable_for_a_seed(monkeypatch):
+    monkeypatch.setattr(forecast, 'SCENARIO_CHUNK', 300)
+    run = dict(start_balance=1000.0, income=INCOME, expenses=EXPENSES, loans=LOANS, years=2, scenarios=1000)
+    bands = forecast.forecast(**run, seed=7)['percentiles']
+
+    for other in (forecast.forecast(**run, seed=7), forecast.forecast(**run, seed=7, max_workers=2)):
+        for percentile in forecast.PERCENTILES:
+            np.testing.assert_array_equal(other['percentiles'][percentile], bands[percentile])
+    assert not np.array_equal(forecast.forecast(**run, seed=8)['percentiles'][50], bands[50])
+
+    assert (bands[10] <= bands[50]).all() and (bands[50] <= bands[90]).all()
+    # The median tracks the deterministic projection
+    balance = forecast.forecast(**run)['balance']
+    assert bands[50] == pytest.approx(balance, rel=0.05)
+
+
+def test_no_volatility_collapses_the_bands_onto_the_projection():
+    result = forecast.forecast(1000.0, INCOME, EXPENSES, LOANS, years=1, scenarios=50, income_volatility=0,
+                               expense_volatility=0, seed=1)
+    for band in result['percentiles'].values():
+        assert band == pytest.approx(result['balance'])
+
+
+def test_horizon_is_limited_to_thirty_years():
+    with pytest.raises(ValueError):
+        forecast.forecast(0.0, INCOME, EXPENSES, LOANS, years=31)
@@ -0,0 +1,44 @@
+import sqlite3
+
+from database import Database
+from migrations import migrate, MIGRATIONS
+from repositories import TransactionsRepository
+
+
+def test_normalized_dates_get_fresh_fingerprints(empty_database):
+    # A database from before the migrations, holding a transaction with a legacy M/D/YYYY date
+    connection = sqlite3.connect(empty_database)
+    connection.execute("DELETE FROM transactions")
+    connection.execute("INSERT INTO transactions (account_id, date, amount, description) "
+                       "VALUES ('123', '4/6/2023', -12.5, 'Coffee Shop')")
+    connection.commit()
+    connection.close()
+
+    db = Database.open(empty_database)
+    assert migrate(db.db_connection) == len(MIGRATIONS)
+    assert db.execute_query("SELECT date FROM transactions").fetchall() == [('2023-04-06',)]
+
+    # Importing the same transaction again, now with its ISO date, is recognized as a duplicate
+    inserted, skipped = TransactionsRepository(db).import_many([{
+        'account_id': '123', 'date': '2023-04-06', 'amount': -12.5, 'description': 'Coffee Shop', 'category': None}])
+    assert (inserted, skipped) == (0, 1)
+    db.close()
+
+
+def test_rows_stored_before_fitids_match_imports_with_a_fitid(empty_database):
+    db = Database.open(empty_database)
+    migrate(db.db_connection)
+    transactions_repo = TransactionsRepository(db)
+    # The shipped database's transaction, which has no FITID
+    (account_id, date, amount, description), = db.execute_query(
+        "SELECT account_id, date, amount, description FROM transactions").fetchall()
+    transaction = {'account_id': account_id, 'date': date, 'amount': amount, 'description': description,
+                   'category': None, 'fitid': 'FIT1'}
+
+    assert transactions_repo.import_many([transaction]) == (0, 1)
+    assert transactions_repo.import_many([transaction]) == (0, 1)
+    # The stored row took over the FITID, so a second identical transaction with its own FITID is new
+    assert transactions_repo.import_many([transaction, dict(transaction, fitid='FIT2')]) == (1, 1)
+    assert transactions_repo.import_many([dict(transaction, fitid=None)]) == (0, 1)
+    assert db.execute_query("SELECT fitid FROM transactions ORDER BY id").fetchall() == [('FIT1',), ('FIT2',)]
+    db.close()
@@ -0,0 +1,76 @@
+import pytest
+
+from ofx_reader import iter_ofx_transactions
+
+SGML_HEADER = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+SECURITY:NONE
+ENCODING:USASCII
+CHARSET:1252
+COMPRESSION:NONE
+OLDFILEUID:NONE
+NEWFILEUID:NONE
+
+"""
+
+XML_HEADER = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<?OFX OFXHEADER="200" VERSION="200" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>
+"""
+
+STATEMENT = """<OFX>
+<SIGNONMSGSRSV1><SONRS><STATUS><CODE>0</CODE><SEVERITY>INFO</SEVERITY></STATUS><DTSERVER>20240110120000</DTSERVER>
+<LANGUAGE>ENG</LANGUAGE></SONRS></SIGNONMSGSRSV1>
+<BANKMSGSRSV1><STMTTRNRS><TRNUID>1</TRNUID><STATUS><CODE>0</CODE><SEVERITY>INFO</SEVERITY></STATUS>
+<STMTRS><CURDEF>USD</CURDEF>
+<BANKACCTFROM><BANKID>121000248</BANKID><ACCTID>12345678</ACCTID><ACCTTYPE>CHECKING</ACCTTYPE></BANKACCTFROM>
+<BANKTRANLIST><DTSTART>20240101</DTSTART><DTEND>20240110</DTEND>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240105220000[-5:EST]</DTPOSTED><TRNAMT>-85.20</TRNAMT>
+<FITID>1001</FITID><NAME>AT&amp;T Bill</NAME></STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20240106</DTPOSTED><TRNAMT>1.025,53</TRNAMT>
+<FITID>1002</FITID><NAME>Payroll</NAME><MEMO>ACME &lt;Payroll&gt;</MEMO></STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240107003000.500[+2:EET]</DTPOSTED><TRNAMT>-4.50</TRNAMT>
+<FITID>1003</FITID><NAME>Coffee  Shop</NAME></STMTTRN>
+</BANKTRANLIST><LEDGERBAL><BALAMT>1000.00</BALAMT><DTASOF>20240110</DTASOF></LEDGERBAL></STMTRS></STMTTRNRS>
+</BANKMSGSRSV1></OFX>
+"""
+
+EXPECTED = [
+    {'account_id': '12345678', 'date': '2024-01-06', 'amount': -85.2, 'description': 'AT&T Bill', 'category': None,
+     'fitid': '1001'},
+    {'account_id': '12345678', 'date': '2024-01-06', 'amount': 1025.53, 'description': 'ACME <Payroll>',
+     'category': None, 'fitid': '1002'},
+    {'account_id': '12345678', 'date': '2024-01-06', 'amount': -4.5, 'description': 'Coffee  Shop',
+     'category': None, 'fitid': '1003'},
+]
+
+
+def _sgml(statement):
+    # OFX 1.x leaves the elements that hold a value unclosed
+    for tag in ('CODE', 'SEVERITY', 'DTSERVER', 'LANGUAGE', 'TRNUID', 'CURDEF', 'BANKID', 'ACCTID', 'ACCTTYPE',
+                'DTSTART', 'DTEND', 'TRNTYPE', 'DTPOSTED', 'TRNAMT', 'FITID', 'NAME', 'MEMO', 'BALAMT', 'DTASOF'):
+        statement = statement.replace(f"</{tag}>", '')
+    return SGML_HEADER + statement
+
+
+@pytest.fixture(params=['sgml', 'xml'])
+def statement_file(request, tmp_path):
+    file_path = tmp_path / f"statement-{request.param}.ofx"
+    file_path.write_text(_sgml(STATEMENT) if request.param == 'sgml' else XML_HEADER + STATEMENT)
+    return str(file_path)
+
+
+def test_sgml_and_xml_statements_read_the_same(statement_file):
+    assert list(iter_ofx_transactions(statement_file)) == EXPECTED
+
+
+def test_chunk_boundaries_do_not_change_the_result(statement_file):
+    for chunk_size in list(range(1, 40)) + [127, 1000]:
+        assert list(iter_ofx_transactions(statement_file, chunk_size)) == EXPECTED, chunk_size
+
+
+@pytest.mark.filterwarnings('ignore')  # ofxparse's own deprecation and parser warnings
+def test_streaming_reader_matches_ofxparse(statement_file):
+    pytest.importorskip('ofxparse')
+    from importer import import_ofx, parse_ofx
+    assert list(iter_ofx_transactions(statement_file)) == parse_ofx(import_ofx(statement_file))
@@ -0,0 +1,42 @@
+from reports import Reports
+from repositories import TransactionsRepository
+
+# The summary table's rows, and what they must add up to when recomputed from every transaction
+SUMMARY = "SELECT month, category, ROUND(total, 2), ROUND(income, 2), ROUND(expenses, 2), count " \
+          "FROM monthly_category_totals ORDER BY month, category"
+FRESH = "SELECT substr(date, 1, 7), COALESCE(category, 'Uncategorized'), ROUND(SUM(amount), 2), " \
+        "ROUND(SUM(MAX(amount, 0)), 2), ROUND(SUM(MAX(-amount, 0)), 2), COUNT(*) " \
+        "FROM transactions GROUP BY 1, 2 ORDER BY 1, 2"
+
+
+def assert_summary_is_current(db):
+    assert db.execute_query(SUMMARY).fetchall() == db.execute_query(FRESH).fetchall()
+
+
+def test_summary_table_follows_inserts_updates_and_deletes(db):
+    transactions_repo = TransactionsRepository(db)
+    transactions_repo.create_many([('1', '2024-01-02', -12.5, 'GROCERY STORE', 'Groceries'),
+                                   ('1', '2024-01-15', 2000.0, 'PAYROLL', 'Income'),
+                                   ('1', '2024-01-20', -40.0, 'FUEL STOP', None),
+                                   ('2', '2024-02-03', -7.25, 'GROCERY STORE', 'Groceries')])
+    transactions_repo.create('2', '2024-02-10', -3.0, 'COFFEE', '')
+    transactions_repo.import_many([{'account_id': '1', 'date': '2024-02-28', 'amount': 15.0,
+                                    'description': 'REFUND', 'category': 'Groceries', 'fitid': 'A1'},
+                                   {'account_id': '1', 'date': '2024-01-02', 'amount': -12.5,
+                                    'description': 'GROCERY STORE', 'category': None}])  # Duplicate, skipped
+    assert_summary_is_current(db)
+    ids = {row[4]: row[0] for row in transactions_repo.page()}
+
+    # Moving a transaction to another month, category and sign, then categorizing and uncategorizing
+    transactions_repo.update(ids['FUEL STOP'], '1', '2024-03-01', 25.0, 'FUEL STOP', 'Fuel')
+    transactions_repo.update_category(ids['COFFEE'], 'Dining')
+    transactions_repo.update_category_many([(ids['PAYROLL'], ''), (ids['REFUND'], 'Income')])
+    assert_summary_is_current(db)
+
+    # Emptied groups disappear instead of lingering with a zero count
+    transactions_repo.delete(ids['FUEL STOP'])
+    transactions_repo.delete_many([ids['COFFEE'], ids['REFUND']])
+    assert_summary_is_current(db)
+    assert ('2024-03', 'Fuel') not in {row[:2] for row in db.execute_query(SUMMARY)}
+
+    assert Reports(db).monthly_category_totals('2024-02', '2024-02') == [('2024-02', 'Groceries', -7.25, 1)]
@@ -0,0 +1,84 @@
+import pytest
+
+from database import Database
+from repositories import TransactionFilter, TransactionsRepository
+
+# Filters by equality (account, category, uncategorized) have an index for either sort order behind them. Ranges on
+# the other column than the sort are left to the planner, which sorts a narrow range rather than walking an index.
+EQUALITY_FILTERS = [TransactionFilter(), TransactionFilter(account_id='1'), TransactionFilter(category='Groceries'),
+                    TransactionFilter(uncategorized=True)]
+
+
+@pytest.fixture
+def profiler():
+    profiler = Database.enable_profiling()
+    yield profiler
+    Database.disable_profiling()
+
+
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('sort', sorted(TransactionFilter.SORT_COLUMNS))
+def test_pages_filtered_by_equality_are_read_in_index_order(db, profiler, sort, descending):
+    transactions_repo = TransactionsRepository(db)
+    for transaction_filter in EQUALITY_FILTERS:
+        transaction_filter = transaction_filter.replace(sort=sort, descending=descending)
+        transactions_repo.page(None, 10, transaction_filter)
+        transactions_repo.page((0, 0), 10, transaction_filter)
+
+    report = profiler.report()
+    assert len(report) == 2 * len(EQUALITY_FILTERS)
+    for entry in report:
+        assert not any('TEMP B-TREE' in step for step in entry['plan']), (entry['query'], entry['plan'])
+
+
+def test_blank_categories_are_stored_as_null(db):
+    transactions_repo = TransactionsRepository(db)
+    transactions_repo.create('1', '2024-01-02', -12.5, 'GROCERY STORE', '')
+    transactions_repo.create('1', '2024-01-03', -40.0, 'FUEL STOP', 'Fuel')
+    transaction_id = transactions_repo.page()[0][0]
+    transactions_repo.update_category(transaction_id, '')
+
+    uncategorized = transactions_repo.page(transaction_filter=TransactionFilter(uncategorized=True))
+    assert [(row[4], row[5]) for row in uncategorized] == [('FUEL STOP', None), ('GROCERY STORE', None)]
+
+
+def test_identical_transactions_can_be_entered_by_hand(db):
+    transactions_repo = TransactionsRepository(db)
+    coffee = ('1', '2024-01-02', -5.0, 'COFFEE', None)
+    transactions_repo.create(*coffee)
+    transactions_repo.create(*coffee)
+    transactions_repo.create_many([coffee, coffee])
+    assert len(transactions_repo.all()) == 4
+
+    # Importing the same transaction recognizes the stored ones
+    inserted, skipped = transactions_repo.import_many([{'account_id': '1', 'date': '2024-01-02', 'amount': -5.0,
+                                                        'description': 'COFFEE', 'category': None}])
+    assert (inserted, skipped) == (0, 1)
+
+
+def _search_descriptions(transactions_repo, text):
+    return [row[4] for row in transactions_repo.search(text)]
+
+
+def test_search_follows_updates_and_deletes(db):
+    transactions_repo = TransactionsRepository(db)
+    transactions_repo.create('1', '2024-01-02', -12.5, 'GROCERY STORE', 'Groceries')
+    transactions_repo.import_many([{'account_id': '1', 'date': '2024-01-03', 'amount': -40.0,
+                                    'description': 'FUEL STOP', 'category': None, 'fitid': 'A1'},
+                                   {'account_id': '1', 'date': '2024-01-04', 'amount': -9.0,
+                                    'description': 'AMAZON MARKETPLACE', 'category': None, 'fitid': 'A2'}])
+    ids = {row[4]: row[0] for row in transactions_repo.page()}
+    assert _search_descriptions(transactions_repo, 'amaz mark') == ['AMAZON MARKETPLACE']
+    assert _search_descriptions(transactions_repo, 'groceries') == ['GROCERY STORE']
+
+    transactions_repo.update(ids['GROCERY STORE'], '1', '2024-01-02', -12.5, 'FARMERS MARKET', 'Groceries')
+    transactions_repo.update_category(ids['FUEL STOP'], 'Car')
+    assert _search_descriptions(transactions_repo, 'grocery') == []
+    assert _search_descriptions(transactions_repo, 'market') == ['AMAZON MARKETPLACE', 'FARMERS MARKET']
+    assert _search_descriptions(transactions_repo, 'car') == ['FUEL STOP']
+
+    transactions_repo.delete(ids['AMAZON MARKETPLACE'])
+    transactions_repo.update_category(ids['FUEL STOP'], '')
+    assert _search_descriptions(transactions_repo, 'market') == ['FARMERS MARKET']
+    assert _search_descriptions(transactions_repo, 'car') == []
+    db.execute_query("INSERT INTO transactions_fts (transactions_fts, rank) VALUES ('integrity-check', 1)")
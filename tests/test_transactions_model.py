@@ -0,0 +1,82 @@
+import pytest
+
+from ClassTransactionsTableModel import TransactionsTableModel
+from repositories import TransactionsRepository
+
+ROWS = [(2, '1', '2024-01-03', -40.0, 'FUEL STOP', 'Fuel'), (1, '1', '2024-01-02', -12.5, 'GROCERY STORE', None)]
+
+
+def test_closing_the_editor_unchanged_is_not_an_edit():
+    model = TransactionsTableModel(None)
+    model.load(ROWS)
+    uncategorized = model.index(1, model.CATEGORY_COLUMN)
+
+    assert not model.setData(uncategorized, model.data(uncategorized))
+    assert not model.setData(model.index(0, model.CATEGORY_COLUMN), 'Fuel')
+    assert model.dirty_rows() == []
+
+
+def test_edited_categories_are_saved_with_blank_as_none():
+    model = TransactionsTableModel(None)
+    model.load(ROWS)
+
+    assert model.setData(model.index(1, model.CATEGORY_COLUMN), 'Groceries')
+    assert model.setData(model.index(0, model.CATEGORY_COLUMN), '')
+    assert model.dirty_rows() == [(2, 'FUEL STOP', None), (1, 'GROCERY STORE', 'Groceries')]
+
+
+class QueuedWorker:
+    """Stands in for DatabaseWorker, running the submitted tasks only when run() is called."""
+
+    def __init__(self, db):
+        self.db = db
+        self.queued = []
+
+    def submit(self, task, *args, on_result=None, on_error=None):
+        self.queued.append(lambda: on_result(task(self.db, *args)))
+
+    def run(self):
+        queued, self.queued = self.queued, []
+        for call in queued:
+            call()
+
+
+@pytest.fixture
+def paged_model(db, monkeypatch):
+    monkeypatch.setattr(TransactionsTableModel, 'PAGE_SIZE', 2)
+    transactions_repo = TransactionsRepository(db)
+    transactions_repo.create_many(('1', f"2024-01-0{day}", -day, f"PURCHASE {day}", None) for day in range(1, 6))
+    worker = QueuedWorker(db)
+    model = TransactionsTableModel(None, None, worker)
+    model.load(TransactionsTableModel.first_page(transactions_repo))
+    return model, worker
+
+
+def test_next_page_is_prefetched_on_the_worker_and_appended_when_fetched(paged_model):
+    model, worker = paged_model
+    assert model.canFetchMore() and model.canFetchMore()
+    assert len(worker.queued) == 1 and model.rowCount() == 2
+    worker.run()
+    assert model.rowCount() == 2
+
+    model.fetchMore()
+    assert model.rowCount() == 4
+    assert len(worker.queued) == 1  # The page after it is already being read
+
+    # Asked for before it arrived, so it is appended on arrival
+    model.fetchMore()
+    worker.run()
+    assert [model.data(model.index(row, 4)) for row in range(model.rowCount())] == \
+        [f"PURCHASE {day}" for day in range(5, 0, -1)]
+    assert not model.canFetchMore() and worker.queued == []
+
+
+def test_pages_requested_before_a_reload_are_dropped(paged_model):
+    model, worker = paged_model
+    model.canFetchMore()
+    model.fetchMore()
+    model.load(ROWS)
+    worker.run()
+    assert model.rowCount() == 2
+    model.fetchMore()
+    assert model.rowCount() == 2